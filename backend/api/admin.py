@@ -3,6 +3,7 @@ from .models import (
     FoodItem, Recipe, Todo, Category, WasteProduct, ProductImage,
     Interest, Message, Review, UserProfile, Favorite, Report
 )
+from .bulk import complete_todos, uncomplete_todos
 
 
 @admin.register(FoodItem)
@@ -53,17 +54,13 @@ class TodoAdmin(admin.ModelAdmin):
     actions = ['mark_completed', 'mark_incomplete']
     
     def mark_completed(self, request, queryset):
-        for todo in queryset:
-            if not todo.is_completed:
-                todo.toggle_completion()
-        self.message_user(request, f"{queryset.count()} todos marked as completed.")
+        updated = complete_todos(queryset)
+        self.message_user(request, f"{updated} todos marked as completed.")
     mark_completed.short_description = "Mark selected todos as completed"
     
     def mark_incomplete(self, request, queryset):
-        for todo in queryset:
-            if todo.is_completed:
-                todo.toggle_completion()
-        self.message_user(request, f"{queryset.count()} todos marked as incomplete.")
+        updated = uncomplete_todos(queryset)
+        self.message_user(request, f"{updated} todos marked as incomplete.")
     mark_incomplete.short_description = "Mark selected todos as incomplete"
 
 
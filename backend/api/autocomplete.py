@@ -0,0 +1,288 @@
+"""
+In-memory prefix index for marketplace search-as-you-type.
+
+Suggestions come from the titles, categories and normalized locations of
+available products. Every word start of a term is stored as a key in one
+sorted list, so a lookup is a ``bisect`` to the first key at or after the
+typed prefix followed by a forward scan over the keys it matches; the
+database is not touched. One- and two-character prefixes match too many keys
+to scan per keystroke, so terms are also bucketed by those prefixes and the
+best ``SHORT_PREFIX_TOP`` of each bucket and kind are kept ranked. Writes
+drop the ranking of the buckets they touch and it is rebuilt on next use.
+
+Each term carries a popularity weight: for titles the number of available
+listings with that title plus their favourites, for locations and categories
+the number of available listings using them. Writes in this process update
+the index from model signals; writes from other worker processes are picked
+up when the index ages out and is reloaded (``AUTOCOMPLETE_INDEX_MAX_AGE``).
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from itertools import chain
+
+from django.conf import settings
+
+TITLE = 'title'
+CATEGORY = 'category'
+LOCATION = 'location'
+
+KINDS = (TITLE, CATEGORY, LOCATION)
+
+# Prefixes up to this length are answered from ranked buckets
+SHORT_PREFIX_LENGTH = 2
+# Suggestions kept per short prefix and kind, the most a lookup can ask for
+SHORT_PREFIX_TOP = 20
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize_term(text):
+    """Lowercased words joined by single spaces, punctuation dropped"""
+    return ' '.join(_WORD_RE.findall((text or '').lower()))
+
+
+def normalize_location(location):
+    """
+    Canonical display form of a free-text location, e.g.
+    ``' westlands ,NAIROBI '`` -> ``'Westlands, Nairobi'``.
+    """
+    parts = [' '.join(part.split()) for part in (location or '').split(',')]
+    return ', '.join(part.title() for part in parts if part)
+
+
+class PrefixIndex:
+    """Sorted-array prefix index over weighted terms"""
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._reset()
+
+    def _reset(self):
+        # Sorted (key, kind, term) tuples, one per word start of each term
+        self._keys = []
+        # (kind, term) -> [label, weight]
+        self._terms = {}
+        # product id -> (title, location, category_id, favorites)
+        self._products = {}
+        # category id -> (term, label)
+        self._categories = {}
+        # short prefix -> {(kind, term)} of terms with a word starting with it
+        self._short_terms = defaultdict(set)
+        # (short prefix, kind) -> best SHORT_PREFIX_TOP ranking tuples
+        self._short_top = {}
+
+    @property
+    def is_loaded(self):
+        return self._loaded_at is not None
+
+    def is_stale(self):
+        if self._loaded_at is None:
+            return True
+        return self.max_age is not None and time.monotonic() - self._loaded_at > self.max_age
+
+    @staticmethod
+    def _word_starts(term):
+        words = term.split(' ')
+        return [' '.join(words[i:]) for i in range(len(words))]
+
+    @classmethod
+    def _short_prefixes(cls, term):
+        return {
+            key[:length]
+            for key in cls._word_starts(term)
+            for length in range(1, SHORT_PREFIX_LENGTH + 1)
+        }
+
+    def _rank(self, prefix, matches):
+        """Ranking tuples for (kind, term) pairs matching ``prefix``"""
+        for kind, term in matches:
+            label, weight = self._terms[(kind, term)]
+            yield (not term.startswith(prefix), -weight, label, kind)
+
+    def _short_prefix_top(self, prefix, kind):
+        top = self._short_top.get((prefix, kind))
+        if top is None:
+            matches = [match for match in self._short_terms.get(prefix, ()) if match[0] == kind]
+            top = self._short_top[(prefix, kind)] = heapq.nsmallest(
+                SHORT_PREFIX_TOP, self._rank(prefix, matches)
+            )
+        return top
+
+    def _adjust(self, kind, label, delta, term=None, build=False):
+        term = normalize_term(label) if term is None else term
+        if not term:
+            return
+        entry = self._terms.get((kind, term))
+        if entry is None:
+            if delta <= 0:
+                return
+            entry = self._terms[(kind, term)] = [label, 0]
+            for key in self._word_starts(term):
+                if build:
+                    self._keys.append((key, kind, term))
+                else:
+                    insort(self._keys, (key, kind, term))
+            for prefix in self._short_prefixes(term):
+                self._short_terms[prefix].add((kind, term))
+        entry[1] += delta
+        if entry[1] <= 0:
+            del self._terms[(kind, term)]
+            for key in self._word_starts(term):
+                position = bisect_left(self._keys, (key, kind, term))
+                if position < len(self._keys) and self._keys[position] == (key, kind, term):
+                    del self._keys[position]
+            for prefix in self._short_prefixes(term):
+                bucket = self._short_terms[prefix]
+                bucket.discard((kind, term))
+                if not bucket:
+                    del self._short_terms[prefix]
+        if not build:
+            for prefix in self._short_prefixes(term):
+                self._short_top.pop((prefix, kind), None)
+
+    def _add_category(self, category_id, name, build=False):
+        label = name.strip()
+        term = normalize_term(label)
+        self._categories[category_id] = (term, label)
+        # A category is suggested even before it has any listings
+        self._adjust(CATEGORY, label, 1, term=term, build=build)
+
+    def _add_product(self, product_id, title, location, category_id, favorites, build=False):
+        location = normalize_location(location)
+        self._products[product_id] = (title, location, category_id, favorites)
+        self._adjust(TITLE, title.strip(), 1 + favorites, build=build)
+        self._adjust(LOCATION, location, 1, build=build)
+        category = self._categories.get(category_id)
+        if category is not None:
+            self._adjust(CATEGORY, category[1], 1, term=category[0], build=build)
+
+    def _remove_product(self, product_id):
+        previous = self._products.pop(product_id, None)
+        if previous is None:
+            return None
+        title, location, category_id, favorites = previous
+        self._adjust(TITLE, title.strip(), -(1 + favorites))
+        self._adjust(LOCATION, location, -1)
+        category = self._categories.get(category_id)
+        if category is not None:
+            self._adjust(CATEGORY, category[1], -1, term=category[0])
+        return previous
+
+    def load_rows(self, categories, products):
+        """
+        Replace the index contents. ``categories`` yields (id, name) and
+        ``products`` yields (id, title, location, category_id, favorites).
+        """
+        with self._lock:
+            self._reset()
+            for category_id, name in categories:
+                self._add_category(category_id, name, build=True)
+            for row in products:
+                self._add_product(*row, build=True)
+            self._keys.sort()
+            self._loaded_at = time.monotonic()
+
+    def load(self):
+        """Reload the index from the database"""
+        from django.db.models import Count
+        from .models import Category, WasteProduct
+
+        categories = list(Category.objects.values_list('id', 'name'))
+        products = list(WasteProduct.objects.filter(status='available').order_by().annotate(
+            favorites=Count('favorited_by')
+        ).values_list('id', 'title', 'location', 'category_id', 'favorites'))
+        self.load_rows(categories, products)
+
+    def ensure_loaded(self):
+        if self.is_stale():
+            self.load()
+
+    def upsert_product(self, product):
+        """Add, re-weight or drop a product after it has been saved"""
+        with self._lock:
+            previous = self._remove_product(product.pk)
+            if product.status != 'available':
+                return
+            favorites = previous[3] if previous else 0
+            self._add_product(
+                product.pk, product.title, product.location, product.category_id, favorites
+            )
+
+    def remove_product(self, product_id):
+        with self._lock:
+            self._remove_product(product_id)
+
+    def adjust_favorites(self, product_id, delta):
+        with self._lock:
+            previous = self._products.get(product_id)
+            if previous is None:
+                return
+            title, location, category_id, favorites = previous
+            self._products[product_id] = (title, location, category_id, max(favorites + delta, 0))
+            self._adjust(TITLE, title.strip(), max(favorites + delta, 0) - favorites)
+
+    def upsert_category(self, category):
+        with self._lock:
+            previous = self._categories.get(category.pk)
+            label = category.name.strip()
+            if previous is None:
+                self._add_category(category.pk, label)
+                return
+            if previous[1] == label:
+                return
+            # Carry the listing weight over to the new name
+            weight = self._terms.get((CATEGORY, previous[0]), [None, 0])[1]
+            self._adjust(CATEGORY, previous[1], -weight, term=previous[0])
+            self._categories[category.pk] = (normalize_term(label), label)
+            self._adjust(CATEGORY, label, weight)
+
+    def remove_category(self, category_id):
+        with self._lock:
+            previous = self._categories.pop(category_id, None)
+            if previous is not None:
+                weight = self._terms.get((CATEGORY, previous[0]), [None, 0])[1]
+                self._adjust(CATEGORY, previous[1], -weight, term=previous[0])
+
+    def suggest(self, prefix, limit=10, kinds=None):
+        """
+        Return up to ``limit`` suggestions for ``prefix`` as dicts with
+        ``text``, ``type`` and ``weight``. Terms that start with the prefix
+        rank ahead of terms with a later word matching it, then by weight.
+        """
+        prefix = normalize_term(prefix)
+        if not prefix:
+            return []
+        kinds = [kind for kind in KINDS if not kinds or kind in kinds]
+        with self._lock:
+            if len(prefix) <= SHORT_PREFIX_LENGTH and limit <= SHORT_PREFIX_TOP:
+                candidates = chain.from_iterable(self._short_prefix_top(prefix, kind) for kind in kinds)
+            elif len(prefix) <= SHORT_PREFIX_LENGTH:
+                candidates = self._rank(prefix, [
+                    match for match in self._short_terms.get(prefix, ()) if match[0] in kinds
+                ])
+            else:
+                matches = set()
+                keys = self._keys
+                position = bisect_left(keys, (prefix,))
+                while position < len(keys) and keys[position][0].startswith(prefix):
+                    key, kind, term = keys[position]
+                    position += 1
+                    if kind in kinds:
+                        matches.add((kind, term))
+                candidates = self._rank(prefix, matches)
+            ranked = heapq.nsmallest(limit, candidates)
+        return [
+            {'text': label, 'type': kind, 'weight': -weight}
+            for _, weight, label, kind in ranked
+        ]
+
+
+autocomplete_index = PrefixIndex(
+    max_age=getattr(settings, 'AUTOCOMPLETE_INDEX_MAX_AGE', 300)
+)
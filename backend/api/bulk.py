@@ -0,0 +1,73 @@
+"""
+Set-based mutations of personal records.
+
+Each operation is one ``UPDATE`` or ``DELETE`` over a queryset instead of a
+``save()``/``delete()`` per row. Queryset updates skip model signals, so
+``updated_at`` is set explicitly (the sync endpoint relies on it) and
+dashboard snapshots are dropped here. Queryset deletes still send
+``post_delete`` per row; they run under ``signals.bulk_delete`` so that the
+sync tombstones are written in one ``bulk_create`` and removed food items
+are recorded in the daily rollups once per batch.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_dashboard
+from .models import DeletedRecord, FoodItem
+from .rollups import record_removed_food_items
+from .signals import TOMBSTONE_MODEL_NAMES, bulk_delete
+
+
+def _invalidate_dashboards(user_ids):
+    for user_id in set(user_ids):
+        invalidate_dashboard(user_id)
+
+
+def complete_todos(queryset):
+    """Mark todos completed; ones already done keep their completed_at"""
+    now = timezone.now()
+    queryset = queryset.filter(is_completed=False)
+    user_ids = list(queryset.order_by().values_list('user_id', flat=True).distinct())
+    updated = queryset.update(is_completed=True, completed_at=now, updated_at=now)
+    _invalidate_dashboards(user_ids)
+    return updated
+
+
+def uncomplete_todos(queryset):
+    queryset = queryset.filter(is_completed=True)
+    user_ids = list(queryset.order_by().values_list('user_id', flat=True).distinct())
+    updated = queryset.update(is_completed=False, completed_at=None, updated_at=timezone.now())
+    _invalidate_dashboards(user_ids)
+    return updated
+
+
+def set_todo_priority(queryset, priority):
+    queryset = queryset.exclude(priority=priority)
+    user_ids = list(queryset.order_by().values_list('user_id', flat=True).distinct())
+    updated = queryset.update(priority=priority, updated_at=timezone.now())
+    _invalidate_dashboards(user_ids)
+    return updated
+
+
+def delete_records(queryset):
+    """Delete rows and record their tombstones in one batch; returns the ids"""
+    model = queryset.model
+    rows = list(queryset.values_list('id', 'user_id'))
+    if not rows:
+        return []
+    now = timezone.now()
+    with transaction.atomic(), bulk_delete():
+        DeletedRecord.objects.bulk_create([
+            DeletedRecord(
+                user_id=user_id, model_name=TOMBSTONE_MODEL_NAMES[model],
+                object_id=object_id, deleted_at=now
+            )
+            for object_id, user_id in rows
+        ])
+        if model is FoodItem:
+            record_removed_food_items(queryset.values_list(
+                'user_id', 'expiry_date', 'quantity_amount', 'quantity_unit', 'waste_recorded'
+            ))
+        model.objects.filter(id__in=[object_id for object_id, _ in rows]).delete()
+    _invalidate_dashboards(user_id for _, user_id in rows)
+    return [object_id for object_id, _ in rows]
@@ -0,0 +1,95 @@
+"""
+Response caches for marketplace listings and the personal dashboard.
+
+Cached pages are keyed by a global listing version plus the normalized query
+string. Any write to a product, product image or category bumps the version,
+which orphans every cached page at once instead of deleting keys one by one.
+The same key doubles as the ETag, so a client holding a current page gets a
+304 without the database being touched.
+
+Dashboard snapshots are cached per user and per day, and are dropped when
+that user's food items, recipes or todos change.
+"""
+import hashlib
+import time
+from datetime import date
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+LISTING_VERSION_KEY = 'marketplace:listing:version'
+LISTING_CACHE_TIMEOUT = getattr(settings, 'MARKETPLACE_LISTING_CACHE_TIMEOUT', 300)
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60)
+
+
+def get_listing_version():
+    version = cache.get(LISTING_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a restarted counter never reuses old keys
+        cache.add(LISTING_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(LISTING_VERSION_KEY)
+    return version
+
+
+def bump_listing_version():
+    try:
+        cache.incr(LISTING_VERSION_KEY)
+    except ValueError:
+        get_listing_version()
+
+
+def invalidate_listings():
+    """Bump the listing version once the current transaction commits"""
+    transaction.on_commit(bump_listing_version)
+
+
+def listing_digest(request):
+    """Hash of the normalized query string (sorted, blank values dropped)"""
+    params = sorted(
+        (key, value)
+        for key in request.query_params
+        for value in request.query_params.getlist(key)
+        if value != ''
+    )
+    # Pagination links are absolute, so the host is part of the key
+    raw = f'{request.scheme}://{request.get_host()}?{urlencode(params)}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def cached_listing_response(request, prefix, build_response):
+    """
+    Serve a listing from the versioned cache, building it with
+    ``build_response()`` on a miss. Honours ``If-None-Match``.
+    """
+    version = get_listing_version()
+    digest = listing_digest(request)
+    key = f'marketplace:{prefix}:{version}:{digest}'
+    etag = f'"{prefix}-{version}-{digest}"'
+
+    if_none_match = request.headers.get('If-None-Match', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')]:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    data = cache.get(key)
+    if data is None:
+        response = build_response()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        data = response.data
+        cache.set(key, data, LISTING_CACHE_TIMEOUT)
+
+    return Response(data, headers={'ETag': etag})
+
+
+def dashboard_cache_key(user_id):
+    # The date is part of the key because expired/expiring counts roll over daily
+    return f'dashboard:{user_id}:{date.today().isoformat()}'
+
+
+def invalidate_dashboard(user_id):
+    """Drop a user's dashboard snapshot once the current transaction commits"""
+    transaction.on_commit(lambda: cache.delete(dashboard_cache_key(user_id)))
@@ -2,71 +2,139 @@
 WebSocket consumers for real-time chat and notifications
 """
 import json
+import uuid
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth import get_user_model
-from .models import Message, WasteProduct
+from django.db.models import Q
+from django.utils import timezone
+from .message_buffer import message_buffer
+from .models import Interest, Message
+from .serializers import MessageSerializer
 
-User = get_user_model()
+
+# Application close codes for rejected connections
+CLOSE_UNAUTHENTICATED = 4401
+CLOSE_FORBIDDEN = 4403
+
+MAX_MESSAGE_LENGTH = 5000
+
+# Conversations one multiplexed connection may follow at once
+MAX_CHAT_SUBSCRIPTIONS = 50
+
+CHAT_STREAM = 'chat'
+NOTIFICATIONS_STREAM = 'notifications'
+
+
+def chat_group_name(interest_id):
+    return f'chat_interest_{interest_id}'
+
+
+def notification_group_name(user_id):
+    return f'notifications_{user_id}'
+
+
+@database_sync_to_async
+def is_interest_participant(user_id, interest_id):
+    return Interest.objects.filter(
+        Q(buyer_id=user_id) | Q(product__seller_id=user_id),
+        id=interest_id
+    ).exists()
+
+
+def clean_chat_message(text):
+    """Return (content, error) for the text of an incoming chat message"""
+    content = str(text or '').strip()
+    if not content:
+        return None, 'Message cannot be empty'
+    if len(content) > MAX_MESSAGE_LENGTH:
+        return None, f'Message cannot be longer than {MAX_MESSAGE_LENGTH} characters'
+    return content, None
+
+
+async def publish_chat_message(channel_layer, interest_id, user, content):
+    """
+    Broadcast a chat message to its conversation and queue it for a batched
+    insert; returns an error message instead when the buffer is full
+    """
+    if message_buffer.is_full:
+        return 'Chat is busy, please try again shortly'
+    message = Message(
+        interest_id=interest_id,
+        sender=user,
+        content=content,
+        created_at=timezone.now()
+    )
+    # The row has no id until the buffer is flushed, so the broadcast carries
+    # a uuid clients can key the pending message on; the buffer announces
+    # the stored id for it in a chat_stored event
+    message._broadcast_uuid = str(uuid.uuid4())
+    data = MessageSerializer(message).data
+    data['uuid'] = message._broadcast_uuid
+    await channel_layer.group_send(
+        chat_group_name(interest_id),
+        {
+            'type': 'chat_message',
+            'message': data,
+        }
+    )
+    await message_buffer.add(message)
+    return None
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
-    """WebSocket consumer for product-specific chat"""
+    """
+    WebSocket consumer for the conversation of one interest.
+
+    The user (from ``api.middleware``) and their membership of the interest
+    are checked once at connect. After that each message is broadcast to
+    the group straight away, with the sender taken from the connection
+    rather than the payload, and queued on ``message_buffer`` to be
+    inserted in a batch.
+    """
     
     async def connect(self):
-        self.product_id = self.scope['url_route']['kwargs']['product_id']
-        self.room_group_name = f'chat_{self.product_id}'
+        self.user = self.scope['user']
+        self.interest_id = int(self.scope['url_route']['kwargs']['interest_id'])
+        self.room_group_name = None
+        
+        if not self.user.is_authenticated:
+            await self.close(code=CLOSE_UNAUTHENTICATED)
+            return
+        if not await is_interest_participant(self.user.pk, self.interest_id):
+            await self.close(code=CLOSE_FORBIDDEN)
+            return
         
-        # Join room group
+        self.room_group_name = chat_group_name(self.interest_id)
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
-        
         await self.accept()
     
     async def disconnect(self, close_code):
-        # Leave room group
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        if self.room_group_name:
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
     
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         """Receive message from WebSocket"""
+        # Binary frames arrive as bytes_data with text_data None
         try:
-            text_data_json = json.loads(text_data)
-            message_content = text_data_json['message']
-            sender_id = text_data_json['sender_id']
-            receiver_id = text_data_json['receiver_id']
-            
-            # Save message to database
-            message = await self.save_message(
-                self.product_id, 
-                sender_id, 
-                receiver_id, 
-                message_content
-            )
-            
-            # Send message to room group
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'chat_message',
-                    'message': {
-                        'id': str(message.id),
-                        'content': message.content,
-                        'sender_id': str(message.sender.id),
-                        'sender_name': message.sender.get_full_name() or message.sender.username,
-                        'timestamp': message.timestamp.isoformat(),
-                        'product_id': str(message.product.id),
-                    }
-                }
-            )
-        except Exception as e:
-            await self.send(text_data=json.dumps({
-                'error': f'Error processing message: {str(e)}'
-            }))
+            text = json.loads(text_data).get('message')
+        except (ValueError, TypeError, AttributeError):
+            await self.send(text_data=json.dumps({'error': 'Invalid message payload'}))
+            return
+        content, error = clean_chat_message(text)
+        if error:
+            await self.send(text_data=json.dumps({'error': error}))
+            return
+        
+        # Broadcast first; the row is written by the next buffer flush
+        error = await publish_chat_message(self.channel_layer, self.interest_id, self.user, content)
+        if error:
+            await self.send(text_data=json.dumps({'error': error}))
     
     async def chat_message(self, event):
         """Receive message from room group"""
@@ -75,23 +143,129 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'message': event['message']
         }))
     
-    @database_sync_to_async
-    def save_message(self, product_id, sender_id, receiver_id, content):
-        """Save message to database"""
+    async def chat_stored(self, event):
+        """Receive the stored ids of broadcast messages"""
+        await self.send(text_data=json.dumps({
+            'type': 'chat_stored',
+            'messages': event['messages']
+        }))
+
+
+class StreamConsumer(AsyncWebsocketConsumer):
+    """
+    One authenticated connection per client, multiplexing any number of
+    conversations and the user's notifications.
+
+    Client frames are JSON objects with an ``action``:
+
+    - ``{"action": "subscribe", "stream": "chat", "interest": 12}``
+    - ``{"action": "subscribe", "stream": "notifications"}``
+    - ``{"action": "unsubscribe", ...}`` with the same fields
+    - ``{"action": "send", "stream": "chat", "interest": 12, "message": "Hi"}``
+
+    Every frame sent back carries its ``stream`` (and ``interest`` for chat),
+    so the client can route it. Membership of an interest is checked once,
+    when it is subscribed to; sending requires a subscription.
+    """
+    
+    async def connect(self):
+        self.user = self.scope['user']
+        self.chat_interest_ids = set()
+        self.notifications = False
+        
+        if not self.user.is_authenticated:
+            await self.close(code=CLOSE_UNAUTHENTICATED)
+            return
+        await self.accept()
+    
+    async def disconnect(self, close_code):
+        for interest_id in self.chat_interest_ids:
+            await self.channel_layer.group_discard(chat_group_name(interest_id), self.channel_name)
+        if self.notifications:
+            await self.channel_layer.group_discard(notification_group_name(self.user.pk), self.channel_name)
+        self.chat_interest_ids = set()
+        self.notifications = False
+    
+    async def receive(self, text_data=None, bytes_data=None):
         try:
-            product = WasteProduct.objects.get(id=product_id)
-            sender = User.objects.get(id=sender_id)
-            receiver = User.objects.get(id=receiver_id)
-            
-            message = Message.objects.create(
-                product=product,
-                sender=sender,
-                receiver=receiver,
-                content=content
-            )
-            return message
-        except Exception as e:
-            raise Exception(f"Failed to save message: {str(e)}")
+            frame = json.loads(text_data)
+            action, stream = frame['action'], frame['stream']
+            interest_id = int(frame['interest']) if stream == CHAT_STREAM else None
+        except (ValueError, TypeError, KeyError):
+            await self.send_error('Invalid frame: expected action, stream and, for chat, interest')
+            return
+        
+        handler = {
+            'subscribe': self.subscribe,
+            'unsubscribe': self.unsubscribe,
+            'send': self.send_chat,
+        }.get(action)
+        if handler is None or stream not in (CHAT_STREAM, NOTIFICATIONS_STREAM):
+            await self.send_error(f'Unknown action or stream: {action} {stream}')
+            return
+        await handler(stream, interest_id, frame)
+    
+    async def subscribe(self, stream, interest_id, frame):
+        if stream == NOTIFICATIONS_STREAM:
+            if not self.notifications:
+                await self.channel_layer.group_add(notification_group_name(self.user.pk), self.channel_name)
+                self.notifications = True
+        elif interest_id not in self.chat_interest_ids:
+            if len(self.chat_interest_ids) >= MAX_CHAT_SUBSCRIPTIONS:
+                await self.send_error(
+                    f'Cannot follow more than {MAX_CHAT_SUBSCRIPTIONS} conversations', stream, interest_id
+                )
+                return
+            if not await is_interest_participant(self.user.pk, interest_id):
+                await self.send_error('Interest not found or access denied', stream, interest_id)
+                return
+            await self.channel_layer.group_add(chat_group_name(interest_id), self.channel_name)
+            self.chat_interest_ids.add(interest_id)
+        await self.send_frame('subscribed', stream, interest_id)
+    
+    async def unsubscribe(self, stream, interest_id, frame):
+        if stream == NOTIFICATIONS_STREAM:
+            if self.notifications:
+                await self.channel_layer.group_discard(notification_group_name(self.user.pk), self.channel_name)
+                self.notifications = False
+        elif interest_id in self.chat_interest_ids:
+            await self.channel_layer.group_discard(chat_group_name(interest_id), self.channel_name)
+            self.chat_interest_ids.discard(interest_id)
+        await self.send_frame('unsubscribed', stream, interest_id)
+    
+    async def send_chat(self, stream, interest_id, frame):
+        if stream != CHAT_STREAM or interest_id not in self.chat_interest_ids:
+            await self.send_error('Subscribe to the conversation before sending to it', stream, interest_id)
+            return
+        content, error = clean_chat_message(frame.get('message'))
+        if error:
+            await self.send_error(error, stream, interest_id)
+            return
+        error = await publish_chat_message(self.channel_layer, interest_id, self.user, content)
+        if error:
+            await self.send_error(error, stream, interest_id)
+    
+    async def send_frame(self, frame_type, stream, interest_id=None, **payload):
+        frame = {'type': frame_type, 'stream': stream}
+        if interest_id is not None:
+            frame['interest'] = interest_id
+        frame.update(payload)
+        await self.send(text_data=json.dumps(frame))
+    
+    async def send_error(self, error, stream=None, interest_id=None):
+        await self.send_frame('error', stream, interest_id, error=error)
+    
+    async def chat_message(self, event):
+        """Receive message from a conversation group"""
+        await self.send_frame('chat_message', CHAT_STREAM, event['message']['interest'], message=event['message'])
+    
+    async def chat_stored(self, event):
+        """Receive the stored ids of broadcast messages"""
+        await self.send_frame('chat_stored', CHAT_STREAM, event['interest'], messages=event['messages'])
+    
+    async def notification_message(self, event):
+        """Receive notification from the user's group"""
+        await self.send_frame('notification', NOTIFICATIONS_STREAM, notification=event['notification'])
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
@@ -99,7 +273,13 @@ class NotificationConsumer(AsyncWebsocketConsumer):
     
     async def connect(self):
         self.user_id = self.scope['url_route']['kwargs']['user_id']
-        self.notification_group_name = f'notifications_{self.user_id}'
+        self.notification_group_name = notification_group_name(self.user_id)
+        
+        # Only the user themselves may listen to their notifications
+        user = self.scope['user']
+        if not user.is_authenticated or str(user.pk) != self.user_id:
+            await self.close(code=CLOSE_FORBIDDEN if user.is_authenticated else CLOSE_UNAUTHENTICATED)
+            return
         
         # Join notification group
         await self.channel_layer.group_add(
@@ -116,10 +296,16 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
     
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         """Handle incoming notification requests"""
         try:
             data = json.loads(text_data)
+        except (ValueError, TypeError):
+            data = None
+        if not isinstance(data, dict):
+            await self.send(text_data=json.dumps({'error': 'Invalid message payload'}))
+            return
+        try:
             if data.get('type') == 'mark_read':
                 notification_id = data.get('notification_id')
                 await self.mark_notification_read(notification_id)
@@ -149,10 +335,8 @@ async def send_notification_to_user(user_id, notification_data):
     from channels.layers import get_channel_layer
     
     channel_layer = get_channel_layer()
-    notification_group_name = f'notifications_{user_id}'
-    
     await channel_layer.group_send(
-        notification_group_name,
+        notification_group_name(user_id),
         {
             'type': 'notification_message',
             'notification': notification_data
@@ -0,0 +1,117 @@
+"""
+Per-participant conversation summaries for the marketplace inbox.
+
+Every interest has one ``ConversationSummary`` row for the buyer and one for
+the seller, holding the last message preview, the last activity time and
+that participant's unread count. Rows are created with the interest and
+moved by a single ``UPDATE`` per conversation for each message or batch of
+messages written, so the inbox is one indexed range read on (user, last
+activity) instead of per-conversation message queries.
+"""
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.functions import Greatest
+
+# ConversationSummary.last_message_preview max_length
+PREVIEW_LENGTH = 255
+
+
+def message_preview(content):
+    """Whitespace-collapsed message text cut to ``PREVIEW_LENGTH``"""
+    text = ' '.join((content or '').split())
+    if len(text) <= PREVIEW_LENGTH:
+        return text
+    return text[:PREVIEW_LENGTH - 1].rstrip() + '…'
+
+
+def create_summaries(interests):
+    """Create the buyer's and seller's summary rows for new interests"""
+    from .models import ConversationSummary
+
+    summaries = []
+    for interest in interests:
+        seller_id = interest.product.seller_id
+        for user_id, other_user_id in [(interest.buyer_id, seller_id), (seller_id, interest.buyer_id)]:
+            summaries.append(ConversationSummary(
+                interest_id=interest.pk, user_id=user_id, other_user_id=other_user_id,
+                last_activity_at=interest.created_at
+            ))
+    ConversationSummary.objects.bulk_create(summaries, ignore_conflicts=True)
+
+
+def record_message(message):
+    """Make ``message`` the last one of its conversation and count it unread for the recipient"""
+    record_messages([message])
+
+
+def record_messages(messages):
+    """
+    Apply newly inserted messages to their conversations' summaries with one
+    ``UPDATE`` per conversation. The last message fields only move forward in
+    time, so a batch written late does not hide a newer message.
+    """
+    from .models import ConversationSummary
+
+    by_interest = {}
+    for message in messages:
+        by_interest.setdefault(message.interest_id, []).append(message)
+
+    for interest_id, batch in by_interest.items():
+        last = max(batch, key=lambda message: message.created_at)
+        unread_by_sender = {}
+        for message in batch:
+            if not message.is_read:
+                unread_by_sender[message.sender_id] = unread_by_sender.get(message.sender_id, 0) + 1
+        unread = sum(unread_by_sender.values())
+
+        is_newer = Q(last_message_at__isnull=True) | Q(last_message_at__lte=last.created_at)
+        ConversationSummary.objects.filter(interest_id=interest_id).update(
+            last_message_preview=Case(
+                When(is_newer, then=Value(message_preview(last.content))), default=F('last_message_preview')
+            ),
+            last_message_sender_id=Case(
+                When(is_newer, then=Value(last.sender_id)), default=F('last_message_sender_id'),
+                output_field=ConversationSummary._meta.get_field('last_message_sender').target_field
+            ),
+            last_message_at=Case(When(is_newer, then=Value(last.created_at)), default=F('last_message_at')),
+            last_activity_at=Greatest(F('last_activity_at'), Value(last.created_at)),
+            # Everyone's own messages are read by definition
+            unread_count=Case(
+                *[
+                    When(user_id=sender_id, then=F('unread_count') + (unread - count))
+                    for sender_id, count in unread_by_sender.items()
+                ],
+                default=F('unread_count') + unread
+            )
+        )
+
+
+def adjust_unread(interest_id, sender_id, delta):
+    """Move the unread count of everyone in the conversation but ``sender_id``"""
+    from .models import ConversationSummary
+
+    ConversationSummary.objects.filter(interest_id=interest_id).exclude(user_id=sender_id).update(
+        unread_count=Greatest(F('unread_count') + delta, 0)
+    )
+
+
+def refresh_summaries(interest_id):
+    """Recompute an interest's summaries from its messages, e.g. after a message is deleted"""
+    from .models import ConversationSummary, Interest, Message
+
+    interest = Interest.objects.filter(pk=interest_id).values('created_at').first()
+    if interest is None:
+        return
+    last = Message.objects.filter(interest_id=interest_id).order_by('-created_at', '-id').values(
+        'content', 'sender_id', 'created_at'
+    ).first()
+    unread = dict(Message.objects.filter(interest_id=interest_id, is_read=False).order_by().values(
+        'sender_id'
+    ).annotate(count=Count('id')).values_list('sender_id', 'count'))
+
+    for summary in ConversationSummary.objects.filter(interest_id=interest_id):
+        summary.last_message_preview = message_preview(last['content']) if last else ''
+        summary.last_message_sender_id = last['sender_id'] if last else None
+        summary.last_message_at = last['created_at'] if last else None
+        summary.last_activity_at = last['created_at'] if last else interest['created_at']
+        summary.unread_count = sum(count for sender_id, count in unread.items() if sender_id != summary.user_id)
+        summary.save()
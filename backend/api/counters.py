@@ -0,0 +1,58 @@
+"""
+Materialized marketplace statistics.
+
+``MarketplaceCounter`` rows hold the totals served by ``marketplace_stats``.
+Signal handlers apply +/- deltas as rows change, and the
+``reconcile_marketplace_counters`` command recomputes everything from the
+source tables to correct any drift (e.g. from queryset ``update()`` calls that
+bypass signals).
+"""
+from django.db.models import Count, F
+from django.utils import timezone
+
+PRODUCTS = 'products'
+AVAILABLE_PRODUCTS = 'available_products'
+USERS = 'users'
+COMPLETED_TRANSACTIONS = 'completed_transactions'
+CATEGORY_PREFIX = 'category:'
+
+
+def category_key(category_id):
+    return f'{CATEGORY_PREFIX}{category_id}'
+
+
+def adjust_counter(key, delta):
+    """Atomically add ``delta`` to a counter, creating it if needed"""
+    from .models import MarketplaceCounter
+
+    if not delta:
+        return
+    updated = MarketplaceCounter.objects.filter(key=key).update(
+        value=F('value') + delta, updated_at=timezone.now()
+    )
+    if not updated:
+        MarketplaceCounter.objects.get_or_create(key=key)
+        MarketplaceCounter.objects.filter(key=key).update(
+            value=F('value') + delta, updated_at=timezone.now()
+        )
+
+
+def read_counters():
+    """Return every counter as a {key: value} dict in one query"""
+    from .models import MarketplaceCounter
+
+    return dict(MarketplaceCounter.objects.values_list('key', 'value'))
+
+
+def expected_counters(waste_product_model, category_model, interest_model, user_model):
+    """Recompute every counter from the source tables"""
+    counters = {
+        PRODUCTS: waste_product_model.objects.count(),
+        AVAILABLE_PRODUCTS: waste_product_model.objects.filter(status='available').count(),
+        USERS: user_model.objects.count(),
+        COMPLETED_TRANSACTIONS: interest_model.objects.filter(status='completed').count(),
+    }
+    categories = category_model.objects.annotate(product_count=Count('products'))
+    for category_id, product_count in categories.values_list('id', 'product_count'):
+        counters[category_key(category_id)] = product_count
+    return counters
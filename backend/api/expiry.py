@@ -0,0 +1,63 @@
+"""
+Set-based expiry of marketplace listings and pantry items.
+
+Products whose ``available_until`` has passed are moved from 'available' to
+'expired' in bounded batches of queryset ``UPDATE``s, so listing queries can
+rely on the indexed ``status`` column alone. Queryset updates bypass
+``post_save``, so each batch sends ``products_expired`` for the counters,
+listing cache and in-memory indexes.
+
+Food items past their expiry date are counted as wasted in the daily
+rollups the same way, and flagged so that deleting them later does not
+count them a second time.
+"""
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import FoodItem, WasteProduct
+from .rollups import record_wasted_food_items
+from .signals import products_expired
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def expire_products(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Expire every available product past its window; returns the count"""
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        with transaction.atomic():
+            # skip_locked lets concurrent sweepers work on disjoint batches
+            product_ids = list(WasteProduct.objects.select_for_update(skip_locked=True).filter(
+                status='available', available_until__lt=now
+            ).order_by('available_until', 'id').values_list('id', flat=True)[:batch_size])
+            if not product_ids:
+                return expired
+
+            WasteProduct.objects.filter(id__in=product_ids).update(
+                status='expired', updated_at=now
+            )
+            products_expired.send(sender=WasteProduct, product_ids=product_ids)
+        expired += len(product_ids)
+
+
+def record_expired_food_items(today=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Count every food item that expired before ``today`` as wasted; returns the count"""
+    today = today or date.today()
+    recorded = 0
+    while True:
+        with transaction.atomic():
+            rows = list(FoodItem.objects.select_for_update(skip_locked=True).filter(
+                waste_recorded=False, expiry_date__lt=today
+            ).order_by('expiry_date', 'id').values_list(
+                'id', 'user_id', 'expiry_date', 'quantity_amount', 'quantity_unit'
+            )[:batch_size])
+            if not rows:
+                return recorded
+
+            # updated_at is left alone: nothing the owner can see has changed
+            FoodItem.objects.filter(id__in=[row[0] for row in rows]).update(waste_recorded=True)
+            record_wasted_food_items(row[1:] for row in rows)
+        recorded += len(rows)
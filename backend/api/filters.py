@@ -9,6 +9,11 @@ from .models import FoodItem, WasteProduct
 class FoodItemFilter(filters.FilterSet):
     is_expired = filters.BooleanFilter(method='filter_is_expired')
     is_expiring_soon = filters.BooleanFilter(method='filter_is_expiring_soon')
+    
+    # Parsed quantity filters (amounts in g, ml or pcs, see api.quantities)
+    quantity_unit = filters.CharFilter()
+    quantity_min = filters.NumberFilter(field_name='quantity_amount', lookup_expr='gte')
+    quantity_max = filters.NumberFilter(field_name='quantity_amount', lookup_expr='lte')
 
     class Meta:
         model = FoodItem
@@ -52,6 +57,11 @@ class WasteProductFilter(filters.FilterSet):
     seller_verified = filters.BooleanFilter(method='filter_seller_verified')
     seller_rating_min = filters.NumberFilter(method='filter_seller_rating_min')
     
+    # Parsed quantity filters (amounts in g, ml or pcs, see api.quantities)
+    quantity_unit = filters.CharFilter()
+    quantity_min = filters.NumberFilter(field_name='quantity_amount', lookup_expr='gte')
+    quantity_max = filters.NumberFilter(field_name='quantity_amount', lookup_expr='lte')
+    
     # Weight and sustainability
     weight_min = filters.NumberFilter(field_name='estimated_weight', lookup_expr='gte')
     weight_max = filters.NumberFilter(field_name='estimated_weight', lookup_expr='lte')
@@ -81,8 +91,8 @@ class WasteProductFilter(filters.FilterSet):
     
     def filter_seller_verified(self, queryset, name, value):
         if value:
-            return queryset.filter(seller__profile__is_verified=True)
+            return queryset.filter(seller_verified=True)
         return queryset
     
     def filter_seller_rating_min(self, queryset, name, value):
-        return queryset.filter(seller__profile__average_rating__gte=value)
\ No newline at end of file
+        return queryset.filter(seller_rating__gte=value)
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Geospatial helpers for marketplace location queries.
+
+Products are bucketed into geohash cells so that radius searches only read
+the rows in the handful of cells that overlap the search circle, instead of
+every product with coordinates.
+"""
+import math
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # ~5m x 5m cells
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Sorts after every geohash character, so [cell, cell + GEOHASH_UPPER_BOUND)
+# is the index range covering every hash that starts with ``cell``.
+GEOHASH_UPPER_BOUND = '~'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate pair as a geohash string"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(geohash)
+
+
+def geohash_cell_size(precision):
+    """Return the (latitude, longitude) size in degrees of a geohash cell"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def precision_for_radius(latitude, radius_km):
+    """
+    Return the finest geohash precision whose cells are at least as large as
+    the search radius, so that the 3x3 block around the centre cell covers
+    the whole search circle. Returns 0 when even a single-character cell is
+    too small and no cell filter can be applied.
+    """
+    # Cells get narrower towards the poles; measure at the circle's edge.
+    edge_latitude = min(abs(latitude) + radius_km / KM_PER_DEGREE, 90.0)
+    lng_scale = math.cos(math.radians(edge_latitude))
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_deg, lng_deg = geohash_cell_size(precision)
+        if (lat_deg * KM_PER_DEGREE >= radius_km and
+                lng_deg * KM_PER_DEGREE * lng_scale >= radius_km):
+            return precision
+    return 0
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Return the geohash cells that overlap a search circle, or None when the
+    radius is too large for a cell filter to be useful.
+    """
+    precision = precision_for_radius(latitude, radius_km)
+    if not precision:
+        return None
+
+    lat_deg, lng_deg = geohash_cell_size(precision)
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        cell_lat = latitude + lat_step * lat_deg
+        if cell_lat < -90.0 or cell_lat > 90.0:
+            continue
+        for lng_step in (-1, 0, 1):
+            cell_lng = longitude + lng_step * lng_deg
+            # Wrap around the antimeridian
+            cell_lng = (cell_lng + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(cell_lat, cell_lng, precision))
+    return sorted(cells)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = (math.sin(d_phi / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
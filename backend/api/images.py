@@ -0,0 +1,47 @@
+"""
+Helpers for product image URLs.
+
+The list endpoints render ``WasteProduct.primary_image_url`` and
+``primary_thumbnail_url`` directly; these helpers recompute them whenever a
+product's images change.
+"""
+CLOUDINARY_UPLOAD_SEGMENT = '/image/upload/'
+THUMBNAIL_TRANSFORMATION = 'c_fill,w_300,h_300,q_auto,f_auto'
+
+
+def thumbnail_url(url):
+    """
+    Return a thumbnail URL for an image. Cloudinary URLs get an on-the-fly
+    resize transformation; other storages serve the original image.
+    """
+    if not url:
+        return ''
+    if CLOUDINARY_UPLOAD_SEGMENT in url:
+        return url.replace(
+            CLOUDINARY_UPLOAD_SEGMENT,
+            f'{CLOUDINARY_UPLOAD_SEGMENT}{THUMBNAIL_TRANSFORMATION}/',
+            1
+        )
+    return url
+
+
+def primary_image_urls(product_id, product_image_model):
+    """Return (image_url, thumbnail_url) for a product's primary image"""
+    image = product_image_model.objects.filter(
+        product_id=product_id
+    ).order_by('-is_primary', 'uploaded_at').first()
+    if image is None or not image.image:
+        return '', ''
+    url = image.image.url
+    return url, thumbnail_url(url)
+
+
+def refresh_primary_image(product_id):
+    """Recompute and store the denormalized primary image URLs of a product"""
+    from .models import ProductImage, WasteProduct
+
+    url, thumbnail = primary_image_urls(product_id, ProductImage)
+    WasteProduct.objects.filter(pk=product_id).update(
+        primary_image_url=url,
+        primary_thumbnail_url=thumbnail
+    )
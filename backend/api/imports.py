@@ -0,0 +1,189 @@
+"""
+Streaming bulk import of food items, recipes and todos.
+
+The request body is read line by line from the request stream (NDJSON, or
+CSV with a header row), so memory use does not grow with the upload. Rows are
+validated with the regular serializers and written ``IMPORT_CHUNK_SIZE`` at a
+time with one ``bulk_create`` per chunk inside a transaction. ``bulk_create``
+skips ``save()`` and model signals, so the work those would do (parsed
+quantities, completion time, ingredient index, dashboard cache) is done here.
+
+Rows that cannot be read (a line that is not UTF-8, an NDJSON line that is
+not a JSON object) are reported as row errors like rows that fail
+validation, so one bad row neither aborts the import nor leaves earlier
+chunks written behind a server error.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_dashboard
+from .ingredients import index_new_recipes
+from .models import FoodItem, Recipe, Todo
+from .quantities import parse_quantity
+from .serializers import FoodItemSerializer, RecipeSerializer, TodoSerializer
+
+IMPORT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-lines')
+CSV_CONTENT_TYPES = ('text/csv',)
+
+# CSV cells holding lists: a JSON array, or items separated by "|"
+CSV_LIST_FIELDS = {'ingredients', 'instructions', 'tags'}
+
+NOT_AN_OBJECT = 'Row is not a JSON object'
+NOT_UTF8 = 'Row is not valid UTF-8 text'
+
+
+class UnsupportedImportFormat(Exception):
+    pass
+
+
+def _prepare_food_item(item):
+    item.quantity_amount, item.quantity_unit = parse_quantity(item.quantity)
+
+
+def _prepare_todo(todo):
+    if todo.is_completed and todo.completed_at is None:
+        todo.completed_at = timezone.now()
+
+
+IMPORTERS = {
+    'food-items': (FoodItem, FoodItemSerializer, _prepare_food_item),
+    'recipes': (Recipe, RecipeSerializer, None),
+    'todos': (Todo, TodoSerializer, _prepare_todo),
+}
+
+
+class _DecodedLines:
+    """
+    Decodes body lines as UTF-8. A line that is not valid UTF-8 is decoded
+    with replacement characters and ``invalid`` is set for the caller to
+    check and clear, so the rest of the upload can still be read.
+    """
+
+    def __init__(self, stream):
+        self._stream = iter(stream or ())
+        self.invalid = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self._stream)
+        try:
+            return line.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            self.invalid = True
+            return line.decode('utf-8-sig', errors='replace')
+
+
+def _ndjson_rows(lines):
+    for line in lines:
+        line = line.strip()
+        if lines.invalid:
+            lines.invalid = False
+            yield NOT_UTF8
+            continue
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield NOT_AN_OBJECT
+            continue
+        yield row if isinstance(row, dict) else NOT_AN_OBJECT
+
+
+def _csv_rows(lines):
+    reader = csv.DictReader(lines)
+    # A header that is not UTF-8 makes every row unreadable
+    if reader.fieldnames is not None and lines.invalid:
+        for _ in reader:
+            yield NOT_UTF8
+        return
+    for row in reader:
+        # The reader may consume several lines for one row (quoted newlines)
+        if lines.invalid:
+            lines.invalid = False
+            yield NOT_UTF8
+            continue
+        for field in CSV_LIST_FIELDS & row.keys():
+            value = (row[field] or '').strip()
+            if value.startswith('['):
+                try:
+                    row[field] = json.loads(value)
+                    continue
+                except ValueError:
+                    pass
+            row[field] = [item.strip() for item in value.split('|') if item.strip()]
+        yield row
+
+
+def read_rows(request):
+    """Yield one dict per row from the request body (an error message for unreadable rows)"""
+    content_type = request.content_type.split(';')[0].strip().lower()
+    # DRF exposes the underlying HttpRequest here, which reads lazily line by line
+    lines = _DecodedLines(request.stream)
+    if content_type in NDJSON_CONTENT_TYPES:
+        return _ndjson_rows(lines)
+    if content_type in CSV_CONTENT_TYPES:
+        return _csv_rows(lines)
+    raise UnsupportedImportFormat(
+        f'Unsupported content type {content_type!r}; send NDJSON ({NDJSON_CONTENT_TYPES[0]}) or CSV (text/csv)'
+    )
+
+
+def import_rows(request, resource, rows):
+    """Validate and insert rows chunk by chunk; returns the import report"""
+    model, serializer_class, prepare = IMPORTERS[resource]
+    user = request.user
+    created = 0
+    failed = 0
+    errors = []
+    row_number = 0
+
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, IMPORT_CHUNK_SIZE))
+        if not chunk:
+            break
+
+        instances = []
+        for row in chunk:
+            row_number += 1
+            if isinstance(row, str):
+                row_errors = {'non_field_errors': [row]}
+            else:
+                serializer = serializer_class(data=row, context={'request': request})
+                if serializer.is_valid():
+                    instance = model(user=user, **serializer.validated_data)
+                    if prepare is not None:
+                        prepare(instance)
+                    instances.append(instance)
+                    continue
+                row_errors = serializer.errors
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'row': row_number, 'errors': row_errors})
+
+        if instances:
+            with transaction.atomic():
+                instances = model.objects.bulk_create(instances)
+                if model is Recipe:
+                    index_new_recipes(instances)
+            created += len(instances)
+
+    if created:
+        invalidate_dashboard(user.id)
+
+    return {
+        'created': created,
+        'failed': failed,
+        'errors': errors,
+        'errors_truncated': failed > len(errors),
+    }
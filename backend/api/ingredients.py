@@ -0,0 +1,123 @@
+"""
+Ingredient normalization and the recipe ingredient index.
+
+Free-text ingredient lines ("2 large tomatoes, diced") and pantry item names
+("Tomatoes") are reduced to the same vocabulary terms: lowercase, without
+quantities, units, preparation words or plurals. Every line yields its full
+phrase ("bell pepper") and its head noun ("pepper"), so a pantry item matches
+a recipe on either. ``RecipeIngredient`` rows map each term to the recipes
+that use it, which turns pantry matching into an indexed lookup of a handful
+of terms instead of a scan over every recipe's JSON.
+"""
+import re
+
+UNITS = {
+    'g', 'gram', 'kg', 'kilogram', 'mg', 'ml', 'millilitre', 'milliliter', 'l', 'litre', 'liter',
+    'cup', 'tbsp', 'tablespoon', 'tsp', 'teaspoon', 'oz', 'ounce', 'lb', 'pound',
+    'pinch', 'dash', 'handful', 'bunch', 'clove', 'slice', 'piece', 'can', 'tin',
+    'jar', 'packet', 'pack', 'bottle', 'stick', 'sprig', 'head', 'bulb', 'dozen',
+    'leaf', 'stalk', 'fillet',
+}
+
+DESCRIPTORS = {
+    'a', 'an', 'of', 'and', 'or', 'to', 'for', 'the', 'some', 'about', 'optional', 'taste',
+    'fresh', 'freshly', 'large', 'small', 'medium', 'big', 'whole', 'ripe', 'organic',
+    'chopped', 'diced', 'sliced', 'minced', 'grated', 'crushed', 'peeled', 'cooked',
+    'boneless', 'skinless', 'finely', 'roughly', 'thinly', 'shredded', 'mashed',
+    'frozen', 'dried', 'canned', 'raw', 'extra', 'virgin', 'leftover',
+}
+
+# Words that end in "s" but are not plurals
+_SINGULAR_S = ('ss', 'us', 'is', 'ous')
+_IRREGULAR_PLURALS = {'leaves': 'leaf', 'loaves': 'loaf', 'halves': 'half', 'knives': 'knife'}
+
+_PARENTHETICAL_RE = re.compile(r'\([^)]*\)')
+_QUANTITY_RE = re.compile(r'^[\d/.,\-¼-¾⅐-⅞]+[a-z]*$')
+_WORD_RE = re.compile(r"[a-z\d/.,\-¼-¾⅐-⅞]+")
+
+# Ingredient.name max_length
+MAX_TERM_LENGTH = 100
+
+
+def singularize(word):
+    if word in _IRREGULAR_PLURALS:
+        return _IRREGULAR_PLURALS[word]
+    if len(word) <= 3 or not word.endswith('s') or word.endswith(_SINGULAR_S):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'ches', 'shes', 'xes', 'sses')):
+        return word[:-2]
+    return word[:-1]
+
+
+def ingredient_terms(text):
+    """
+    Vocabulary terms for one ingredient line or pantry item name, e.g.
+    ``'2 red bell peppers, sliced'`` -> ``['red bell pepper', 'pepper']``.
+    """
+    text = _PARENTHETICAL_RE.sub(' ', (text or '').lower())
+    # Anything after the first comma is preparation ("onion, finely chopped")
+    text = text.split(',')[0]
+    words = []
+    for word in _WORD_RE.findall(text):
+        if _QUANTITY_RE.match(word):
+            continue
+        word = singularize(word.strip('.-/'))
+        if not word or word in UNITS or word in DESCRIPTORS:
+            continue
+        words.append(word)
+    if not words:
+        return []
+    phrase = ' '.join(words)[:MAX_TERM_LENGTH]
+    return [phrase] if len(words) == 1 else [phrase, words[-1]]
+
+
+def recipe_terms(ingredients):
+    """Distinct vocabulary terms for a recipe's ingredient list"""
+    terms = set()
+    for line in ingredients or []:
+        if isinstance(line, str):
+            terms.update(ingredient_terms(line))
+    return terms
+
+
+def index_recipe(recipe):
+    """Bring a recipe's ``RecipeIngredient`` rows in line with its ingredients"""
+    from .models import Ingredient, RecipeIngredient
+
+    terms = recipe_terms(recipe.ingredients)
+    vocabulary = dict(Ingredient.objects.filter(name__in=terms).values_list('name', 'id'))
+    missing = terms - vocabulary.keys()
+    if missing:
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name) for name in missing], ignore_conflicts=True
+        )
+        vocabulary = dict(Ingredient.objects.filter(name__in=terms).values_list('name', 'id'))
+
+    wanted = set(vocabulary.values())
+    existing = set(RecipeIngredient.objects.filter(recipe=recipe).values_list('ingredient_id', flat=True))
+    if existing - wanted:
+        RecipeIngredient.objects.filter(recipe=recipe, ingredient_id__in=existing - wanted).delete()
+    if wanted - existing:
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipe, user_id=recipe.user_id, ingredient_id=ingredient_id)
+            for ingredient_id in wanted - existing
+        ], ignore_conflicts=True)
+
+
+def index_new_recipes(recipes):
+    """Index freshly bulk-created recipes (which have no index rows yet) in one pass"""
+    from .models import Ingredient, RecipeIngredient
+
+    terms_by_recipe = [(recipe, recipe_terms(recipe.ingredients)) for recipe in recipes]
+    names = set().union(*(terms for _, terms in terms_by_recipe))
+    if not names:
+        return
+    Ingredient.objects.bulk_create([Ingredient(name=name) for name in names], ignore_conflicts=True)
+    vocabulary = dict(Ingredient.objects.filter(name__in=names).values_list('name', 'id'))
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe=recipe, user_id=recipe.user_id, ingredient_id=vocabulary[name])
+        for recipe, terms in terms_by_recipe
+        for name in terms
+    ], ignore_conflicts=True)
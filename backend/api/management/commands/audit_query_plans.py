@@ -0,0 +1,124 @@
+import re
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Avg, Q
+from django.utils import timezone
+
+from api.models import (
+    FoodItem, Recipe, RecipeIngredient, Todo, DailyUserRollup, DailyCategoryRollup,
+    WasteProduct, Interest, Message, ConversationSummary, Review, Favorite, Report, ProductImage
+)
+
+# Plan lines that mean a whole table is read, per database vendor. On SQLite
+# SCAN walks every row (possibly in index order); SEARCH is a range lookup.
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT ROW)\S+(?: USING (?:COVERING )?INDEX \S+)?'),
+    'postgresql': re.compile(r'\bSeq Scan on \S+'),
+    'mysql': re.compile(r'\bTable scan on \S+'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the representative querysets of the API views and flag full table scans. '
+        'Run against a database with production-like row counts: planners prefer '
+        'scans on tiny tables.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail-on-scan', action='store_true',
+            help='Exit with an error if any queryset plans a full table scan'
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f'Query plan audit is not supported on {vendor}')
+        pattern = FULL_SCAN_PATTERNS[vendor]
+        explain_options = {'format': 'tree'} if vendor == 'mysql' else {}
+
+        flagged = []
+        for label, queryset in self.querysets():
+            plan = queryset.explain(**explain_options)
+            scans = [match.group(0) for match in pattern.finditer(plan)]
+            if scans:
+                flagged.append(label)
+                self.stdout.write(self.style.WARNING(f'FULL SCAN  {label}: {", ".join(scans)}'))
+            else:
+                self.stdout.write(f'ok         {label}')
+            if options['verbosity'] > 1:
+                self.stdout.write(plan + '\n')
+
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS('No full table scans'))
+        elif options['fail_on_scan']:
+            raise CommandError(f'{len(flagged)} querysets plan a full table scan')
+
+    def querysets(self):
+        """(label, queryset) pairs mirroring the filters and orderings of the views"""
+        User = get_user_model()
+        user_id = User.objects.order_by('pk').values_list('pk', flat=True).first() or 0
+        interest_id = Interest.objects.order_by('pk').values_list('pk', flat=True).first() or 0
+        today = date.today()
+        now = timezone.now()
+
+        return [
+            # Personal data
+            ('food items list', FoodItem.objects.filter(user_id=user_id).order_by('expiry_date', 'name', 'id')),
+            ('food items expiring', FoodItem.objects.filter(
+                user_id=user_id, expiry_date__gte=today, expiry_date__lte=today + timedelta(days=7)
+            ).order_by('expiry_date')),
+            ('dashboard expired food', FoodItem.objects.filter(user_id=user_id, expiry_date__lt=today)),
+            ('recipes list', Recipe.objects.filter(user_id=user_id).order_by('-created_at', '-id')),
+            ('recipe suggestions', RecipeIngredient.objects.filter(
+                user_id=user_id, ingredient__name__in=['tomato', 'onion']
+            ).values_list('recipe_id', 'ingredient__name')),
+            ('todos list', Todo.objects.filter(user_id=user_id).order_by('-created_at', '-id')),
+            ('todos overdue', Todo.objects.filter(user_id=user_id, is_completed=False, due_date__lt=now)),
+            ('todos due today', Todo.objects.filter(
+                user_id=user_id, is_completed=False,
+                due_date__gte=now.replace(hour=0, minute=0, second=0, microsecond=0),
+                due_date__lt=now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            ).order_by('due_date')),
+            ('analytics series', DailyUserRollup.objects.filter(
+                user_id=user_id, date__gte=today - timedelta(days=30), date__lte=today
+            )),
+            ('analytics categories', DailyCategoryRollup.objects.filter(
+                user_id=user_id, date__gte=today - timedelta(days=30), date__lte=today
+            )),
+
+            # Marketplace
+            ('products list', WasteProduct.objects.filter(status='available').order_by('-created_at', '-id')[:20]),
+            ('my products', WasteProduct.objects.filter(seller_id=user_id).order_by('-created_at', '-id')),
+            ('my products by status', WasteProduct.objects.filter(seller_id=user_id, status='available')),
+            ('expiry sweep', WasteProduct.objects.filter(status='available', available_until__lt=now)),
+            ('nearby cell range', WasteProduct.objects.filter(
+                status='available', geohash__gte='kzf0', geohash__lt='kzf0~'
+            )),
+            ('product images', ProductImage.objects.filter(product__seller_id=user_id)),
+            ('interests', Interest.objects.filter(
+                Q(buyer_id=user_id) | Q(product__seller_id=user_id)
+            ).order_by('-created_at', '-id')),
+            ('messages', Message.objects.filter(
+                Q(interest__buyer_id=user_id) | Q(interest__product__seller_id=user_id)
+            ).order_by('created_at', 'id')),
+            ('conversations inbox', ConversationSummary.objects.filter(user_id=user_id).order_by(
+                '-last_activity_at', '-id'
+            )[:20]),
+            ('message history', Message.objects.filter(interest_id=interest_id).order_by(
+                '-created_at', '-id'
+            )[:50]),
+            ('unread messages', Message.objects.filter(
+                interest_id=interest_id, is_read=False
+            ).exclude(sender_id=user_id)),
+            ('reviews received', Review.objects.filter(reviewed_user_id=user_id).order_by('-created_at', '-id')),
+            ('average rating', Review.objects.filter(reviewed_user_id=user_id).values('reviewed_user').annotate(
+                avg=Avg('rating')
+            )),
+            ('favorites', Favorite.objects.filter(user_id=user_id).order_by('-created_at', '-id')),
+            ('reports', Report.objects.filter(reporter_id=user_id).order_by('-created_at', '-id')),
+        ]
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from api.models import FoodItem, WasteProduct
+from api.quantities import parse_quantities
+
+
+class Command(BaseCommand):
+    help = 'Parse quantity strings into quantity_amount/quantity_unit for existing rows (run after migrating)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows read and written per batch'
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-parse every row, not only rows without a parsed amount'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, default_unit_field in ((FoodItem, None), (WasteProduct, 'unit')):
+            queryset = model.objects.all()
+            if not options['all']:
+                queryset = queryset.filter(quantity_amount__isnull=True)
+            fields = ['id', 'quantity'] + ([default_unit_field] if default_unit_field else [])
+
+            updated = 0
+            last_id = 0
+            while True:
+                # Keyset batches: each read is an indexed range on the primary key
+                rows = list(queryset.filter(id__gt=last_id).order_by('id').only(*fields)[:batch_size])
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                parsed = parse_quantities(
+                    [row.quantity for row in rows],
+                    [getattr(row, default_unit_field) for row in rows] if default_unit_field else None
+                )
+                changed = []
+                for row, (amount, unit) in zip(rows, parsed):
+                    if amount is not None or options['all']:
+                        row.quantity_amount, row.quantity_unit = amount, unit
+                        changed.append(row)
+                # bulk_update skips save(), so updated_at and signals are untouched
+                model.objects.bulk_update(changed, ['quantity_amount', 'quantity_unit'], batch_size=batch_size)
+                updated += len(changed)
+
+            self.stdout.write(self.style.SUCCESS(f'{model.__name__}: parsed {updated} quantities'))
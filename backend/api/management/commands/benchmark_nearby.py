@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.spatial import CoordinateSnapshot, np
+
+
+class _Product:
+    __slots__ = ('id', 'latitude', 'longitude')
+
+    def __init__(self, id, latitude, longitude):
+        self.id = id
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+def legacy_nearby(products, lat, lng, radius):
+    """The per-row loop the nearby endpoint used before the snapshot"""
+    nearby_products = []
+    for product in products:
+        if product.latitude and product.longitude:
+            lat_diff = abs(float(lat) - product.latitude)
+            lng_diff = abs(float(lng) - product.longitude)
+            distance = ((lat_diff ** 2 + lng_diff ** 2) ** 0.5) * 111
+            if distance <= radius:
+                nearby_products.append(product)
+    return nearby_products
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the vectorized nearby search against the legacy Python loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='10000,100000,1000000',
+            help='Comma-separated product counts to benchmark'
+        )
+        parser.add_argument('--radius', type=float, default=10.0, help='Search radius in km')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per size')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError('numpy is required for the vectorized engine')
+
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        radius = options['radius']
+        repeat = options['repeat']
+        rng = np.random.default_rng(options['seed'])
+        center_lat, center_lng = -1.2921, 36.8219  # Nairobi
+
+        self.stdout.write(f"{'products':>10} {'loop ms':>10} {'numpy ms':>10} {'speedup':>8} {'matches':>8}")
+        for size in sizes:
+            latitudes = center_lat + rng.uniform(-1.0, 1.0, size)
+            longitudes = center_lng + rng.uniform(-1.0, 1.0, size)
+            ids = np.arange(1, size + 1)
+
+            snapshot = CoordinateSnapshot()
+            snapshot.load_rows(
+                ids, latitudes, longitudes,
+                ['available'] * size, np.zeros(size, dtype=np.int64)
+            )
+            products = [
+                _Product(int(pk), float(la), float(ln))
+                for pk, la, ln in zip(ids, latitudes, longitudes)
+            ]
+
+            loop_ms = self._time(
+                lambda: legacy_nearby(products, str(center_lat), str(center_lng), radius), repeat
+            )
+            numpy_ms = self._time(
+                lambda: snapshot.query(center_lat, center_lng, radius), repeat
+            )
+            matches = len(snapshot.query(center_lat, center_lng, radius)[0])
+
+            self.stdout.write(
+                f'{size:>10} {loop_ms:>10.2f} {numpy_ms:>10.2f} '
+                f'{loop_ms / numpy_ms:>7.1f}x {matches:>8}'
+            )
+
+    def _time(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import DeletedRecord
+from api.sync import TOMBSTONE_RETENTION
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than the retention window (run daily)'
+
+    def handle(self, *args, **options):
+        deleted, _ = DeletedRecord.objects.filter(
+            deleted_at__lt=timezone.now() - TOMBSTONE_RETENTION
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} tombstones'))
@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.counters import expected_counters
+from api.models import WasteProduct, Category, Interest, MarketplaceCounter
+
+
+class Command(BaseCommand):
+    help = 'Recompute marketplace counters from the source tables and correct any drift (run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drift without writing corrections'
+        )
+
+    def handle(self, *args, **options):
+        expected = expected_counters(WasteProduct, Category, Interest, get_user_model())
+
+        with transaction.atomic():
+            current = {
+                counter.key: counter
+                for counter in MarketplaceCounter.objects.select_for_update()
+            }
+            corrected = 0
+
+            for key, value in expected.items():
+                counter = current.pop(key, None)
+                if counter is not None and counter.value == value:
+                    continue
+                old_value = counter.value if counter is not None else None
+                self.stdout.write(f'{key}: {old_value} -> {value}')
+                corrected += 1
+                if not options['dry_run']:
+                    MarketplaceCounter.objects.update_or_create(key=key, defaults={'value': value})
+
+            # Counters for categories that no longer exist
+            for key, counter in current.items():
+                self.stdout.write(f'{key}: {counter.value} -> (removed)')
+                corrected += 1
+                if not options['dry_run']:
+                    counter.delete()
+
+        if corrected:
+            verb = 'Found' if options['dry_run'] else 'Corrected'
+            self.stdout.write(self.style.WARNING(f'{verb} {corrected} drifted counters'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All counters are in sync'))
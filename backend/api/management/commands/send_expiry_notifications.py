@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.notifications import DEFAULT_EXPIRY_WINDOW_DAYS, send_expiry_notifications
+
+
+class Command(BaseCommand):
+    help = 'Push one batched expiry alert per user over the channel layer (schedule via cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=DEFAULT_EXPIRY_WINDOW_DAYS,
+            help='Alert on food items expiring within this many days'
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep running, scanning every N seconds (default: scan once)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = send_expiry_notifications(days=options['days'])
+            self.stdout.write(self.style.SUCCESS(f'Sent {sent} expiry notifications'))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
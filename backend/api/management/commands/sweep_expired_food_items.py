@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.expiry import DEFAULT_BATCH_SIZE, record_expired_food_items
+
+
+class Command(BaseCommand):
+    help = 'Count pantry items past their expiry date as wasted in the daily rollups (schedule via cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Food items recorded per transaction'
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep running, sweeping every N seconds (default: sweep once)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            recorded = record_expired_food_items(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Recorded {recorded} expired food items as wasted'))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
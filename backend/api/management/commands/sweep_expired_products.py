@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.expiry import DEFAULT_BATCH_SIZE, expire_products
+
+
+class Command(BaseCommand):
+    help = 'Mark available products past their available_until as expired (schedule via cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Products updated per transaction'
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep running, sweeping every N seconds (default: sweep once)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_products(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Expired {expired} products'))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,270 @@
+"""
+Write-behind persistence for chat messages.
+
+``ChatConsumer`` broadcasts a message to the conversation group as soon as it
+arrives and hands the unsaved ``Message`` to the process's ``message_buffer``.
+The buffer inserts pending messages with one ``bulk_create`` once
+``CHAT_BUFFER_MAX_SIZE`` are queued or ``CHAT_BUFFER_FLUSH_INTERVAL`` seconds
+after the first one was queued, and then applies them to the conversation
+summaries (``bulk_create`` sends no ``post_save``).
+
+Ordering: ``created_at`` is the send time, stamped before the broadcast, and
+history is read in (created_at, id) order, so stored order matches the order
+in which this process received the messages. Batches are written one at a
+time in queue order. Messages from different worker processes are ordered by
+their send times. Until its batch is flushed a message is visible to the
+group only, not in the history endpoint, and its broadcast carries a
+``uuid`` instead of an ``id``. Once a batch is written a ``chat_stored`` event
+maps each uuid to the stored id, so clients can replace their pending copies.
+
+Durability: a batch that fails with an ``OperationalError`` (connection
+lost, database locked) is put back at the head of the queue and retried on
+the next flush, up to ``CHAT_BUFFER_MAX_ATTEMPTS`` times; a failure reported
+after the database committed can therefore store a batch twice. A batch
+rejected with an ``IntegrityError`` (e.g. its interest was deleted meanwhile)
+is written again row by row and the rows that still fail are logged and
+dropped, so one bad message cannot hold up the rest. The queue holds at most
+``CHAT_BUFFER_MAX_PENDING`` messages; while it is full new chat messages are
+refused before they are broadcast.
+
+Shutdown: the queue is drained by the ASGI ``lifespan`` shutdown event
+(uvicorn, hypercorn), by the SIGTERM handler from
+``install_shutdown_handler`` when no server installed its own, and by an
+``atexit`` hook on any normal interpreter exit (daphne stops its reactor on
+SIGTERM and exits normally). ``drain`` writes from a worker thread, so it is
+safe to call while an event loop is still running or stopping in the calling
+thread. Messages still queued when the process is killed (SIGKILL, OOM,
+power loss) are lost, at most one interval or one batch's worth per
+process. Set ``CHAT_BUFFER_MAX_SIZE = 1`` to write every message before the
+next one is taken from the queue.
+"""
+import asyncio
+import atexit
+import logging
+import signal
+import threading
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class MessageBuffer:
+    """Per-process queue of unsaved chat messages, flushed in batches"""
+
+    def __init__(self, max_size=100, flush_interval=0.5, max_pending=10000, max_attempts=5):
+        self.max_size = max(max_size, 1)
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, self.max_size)
+        self.max_attempts = max(max_attempts, 1)
+        self._pending = []
+        # Guards _pending between the event loop and the atexit drain
+        self._lock = threading.Lock()
+        self._loop = None
+        self._flush_lock = None
+        self._timer = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    @property
+    def is_full(self):
+        return len(self._pending) >= self.max_pending
+
+    async def add(self, message):
+        """Queue an unsaved message; must be called from the event loop"""
+        message._flush_attempts = 0
+        with self._lock:
+            self._pending.append(message)
+            size = len(self._pending)
+        if size >= self.max_size:
+            await self.flush()
+        else:
+            self._schedule()
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self._flush_soon)
+
+    def _flush_soon(self):
+        self._timer = None
+        asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        """Write everything queued so far; batches are written one at a time"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._flush_lock = loop, asyncio.Lock()
+        async with self._flush_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch = self._take()
+            if not batch:
+                return
+            try:
+                written, retry = await database_sync_to_async(self._write)(batch)
+            except Exception:
+                logger.exception('Dropped %d chat messages after an unexpected error', len(batch))
+                return
+            if retry:
+                self._requeue(retry)
+                if self._pending:
+                    self._schedule()
+        if written:
+            await self._announce(written)
+
+    def drain(self):
+        """Synchronously write everything queued, e.g. at shutdown; callable from any thread"""
+        batch = self._take()
+        if not batch:
+            return
+        # Django refuses database access from a thread running an event loop
+        worker = threading.Thread(target=self._drain_batch, args=(batch,), name='message-buffer-drain')
+        worker.start()
+        worker.join()
+
+    def _drain_batch(self, batch):
+        try:
+            written, retry = self._write(batch)
+        except Exception:
+            logger.exception('Lost %d chat messages while draining the buffer', len(batch))
+            return
+        finally:
+            connection.close()
+        if retry:
+            logger.error('Lost %d chat messages while draining the buffer', len(retry))
+        if written:
+            async_to_sync(self._announce)(written)
+
+    @staticmethod
+    async def _announce(messages):
+        """Tell each conversation which stored ids its pending broadcasts got"""
+        from channels.layers import get_channel_layer
+        from .consumers import chat_group_name
+
+        stored = defaultdict(list)
+        for message in messages:
+            uuid = getattr(message, '_broadcast_uuid', None)
+            if uuid is not None:
+                stored[message.interest_id].append({'uuid': uuid, 'id': message.pk})
+        channel_layer = get_channel_layer()
+        try:
+            for interest_id, mapping in stored.items():
+                await channel_layer.group_send(chat_group_name(interest_id), {
+                    'type': 'chat_stored',
+                    'interest': interest_id,
+                    'messages': mapping,
+                })
+        except Exception:
+            logger.exception('Failed to announce %d stored chat messages', len(messages))
+
+    def _take(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        return batch
+
+    def _requeue(self, batch):
+        retry = []
+        for message in batch:
+            message._flush_attempts += 1
+            if message._flush_attempts < self.max_attempts:
+                retry.append(message)
+        if len(retry) < len(batch):
+            logger.error(
+                'Dropped %d chat messages after %d failed attempts', len(batch) - len(retry), self.max_attempts
+            )
+        with self._lock:
+            self._pending[:0] = retry
+
+    @classmethod
+    def _write(cls, batch):
+        """
+        Insert a batch; returns the messages written and the messages to
+        retry after a transient failure
+        """
+        try:
+            cls._insert(batch)
+            return batch, []
+        except OperationalError:
+            logger.warning('Failed to write %d chat messages, will retry', len(batch), exc_info=True)
+            return [], batch
+        except IntegrityError:
+            logger.warning('Batch of %d chat messages rejected, writing them one by one', len(batch))
+
+        written = []
+        for position, message in enumerate(batch):
+            try:
+                cls._insert([message])
+            except OperationalError:
+                logger.warning('Failed to write chat messages, will retry', exc_info=True)
+                return written, batch[position:]
+            except IntegrityError as e:
+                logger.error(
+                    'Dropped chat message from user %s in interest %s: %s',
+                    message.sender_id, message.interest_id, e
+                )
+            else:
+                written.append(message)
+        return written, []
+
+    @staticmethod
+    def _insert(batch):
+        from .conversations import record_messages
+        from .models import Message
+
+        # Primary keys returned by a rolled back insert must not be reused
+        for message in batch:
+            message.pk = None
+            message._state.adding = True
+        with transaction.atomic():
+            Message.objects.bulk_create(batch)
+            record_messages(batch)
+
+
+message_buffer = MessageBuffer(
+    max_size=getattr(settings, 'CHAT_BUFFER_MAX_SIZE', 100),
+    flush_interval=getattr(settings, 'CHAT_BUFFER_FLUSH_INTERVAL', 0.5),
+    max_pending=getattr(settings, 'CHAT_BUFFER_MAX_PENDING', 10000),
+    max_attempts=getattr(settings, 'CHAT_BUFFER_MAX_ATTEMPTS', 5),
+)
+atexit.register(message_buffer.drain)
+
+
+def install_shutdown_handler():
+    """
+    Drain the buffer on SIGTERM, then hand the signal on to the handler
+    that was installed before (or exit, for the default one). Servers that
+    install their own handler later replace this one and shut down through
+    lifespan or a normal exit instead.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame):
+        message_buffer.drain()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+
+async def lifespan(scope, receive, send):
+    """ASGI lifespan application that drains the buffer at server shutdown"""
+    while True:
+        event = await receive()
+        if event['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif event['type'] == 'lifespan.shutdown':
+            # flush waits for a write already in progress; drain takes any retries
+            await message_buffer.flush()
+            await asyncio.to_thread(message_buffer.drain)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
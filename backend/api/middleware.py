@@ -0,0 +1,52 @@
+"""
+JWT authentication for WebSocket connections.
+
+Browsers cannot set headers on a WebSocket handshake, so the access token is
+read from ``?token=`` in the query string, or from an ``Authorization:
+Bearer`` header for other clients. The user is resolved once per connection
+and stored as ``scope['user']``; without a valid token the session user from
+``AuthMiddlewareStack`` (usually anonymous) is kept.
+"""
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+
+def get_raw_token(scope):
+    query = parse_qs(scope.get('query_string', b'').decode())
+    if query.get('token'):
+        return query['token'][0]
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            scheme, _, token = value.decode().partition(' ')
+            if scheme.lower() == 'bearer' and token:
+                return token.strip()
+    return None
+
+
+@database_sync_to_async
+def get_token_user(raw_token):
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    async def __call__(self, scope, receive, send):
+        raw_token = get_raw_token(scope)
+        if raw_token:
+            user = await get_token_user(raw_token)
+            if user is not None:
+                scope = dict(scope, user=user)
+        return await super().__call__(scope, receive, send)
+
+
+def JWTAuthMiddlewareStack(inner):
+    # Session auth runs first so a valid token takes precedence over it
+    return AuthMiddlewareStack(JWTAuthMiddleware(inner))
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:37
+
+from django.db import migrations, models
+
+from api.geo import encode_geohash
+
+
+def backfill_geohash(apps, schema_editor):
+    WasteProduct = apps.get_model('api', 'WasteProduct')
+    products = WasteProduct.objects.filter(
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).only('id', 'latitude', 'longitude')
+
+    batch = []
+    for product in products.iterator(chunk_size=2000):
+        product.geohash = encode_geohash(product.latitude, product.longitude)
+        batch.append(product)
+        if len(batch) >= 2000:
+            WasteProduct.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        WasteProduct.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_productimage_cloudinary_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wasteproduct',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
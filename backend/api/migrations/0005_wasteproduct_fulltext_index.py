@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:58
+
+from django.db import migrations
+
+FTS_TABLE = 'api_wasteproduct_fts'
+
+POSTGRES_SEARCH_VECTOR = """
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(location, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'C')
+"""
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"title, description, location, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, location) "
+            f"SELECT id, title, description, location FROM api_wasteproduct"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"ALTER TABLE api_wasteproduct ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS ({POSTGRES_SEARCH_VECTOR}) STORED"
+        )
+        schema_editor.execute(
+            "CREATE INDEX api_wasteproduct_search_vector_idx "
+            "ON api_wasteproduct USING GIN (search_vector)"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS api_wasteproduct_search_vector_idx")
+        schema_editor.execute("ALTER TABLE api_wasteproduct DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_wasteproduct_geohash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:41
+
+from django.db import migrations, models
+
+from api.images import primary_image_urls
+
+
+def backfill_primary_image_urls(apps, schema_editor):
+    WasteProduct = apps.get_model('api', 'WasteProduct')
+    ProductImage = apps.get_model('api', 'ProductImage')
+    product_ids = ProductImage.objects.values_list('product_id', flat=True).distinct()
+    for product_id in product_ids.iterator():
+        url, thumbnail = primary_image_urls(product_id, ProductImage)
+        WasteProduct.objects.filter(pk=product_id).update(
+            primary_image_url=url,
+            primary_thumbnail_url=thumbnail
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_wasteproduct_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wasteproduct',
+            name='primary_image_url',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='wasteproduct',
+            name='primary_thumbnail_url',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500),
+        ),
+        migrations.RunPython(backfill_primary_image_urls, migrations.RunPython.noop),
+    ]
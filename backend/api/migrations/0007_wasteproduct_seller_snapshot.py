@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_seller_snapshot(apps, schema_editor):
+    WasteProduct = apps.get_model('api', 'WasteProduct')
+    UserProfile = apps.get_model('api', 'UserProfile')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    profiles = {
+        profile['user_id']: profile
+        for profile in UserProfile.objects.values('user_id', 'average_rating', 'is_verified')
+    }
+    seller_ids = WasteProduct.objects.values_list('seller_id', flat=True).distinct()
+    for seller in User.objects.filter(id__in=seller_ids).only('id', 'first_name', 'last_name'):
+        profile = profiles.get(seller.id, {})
+        WasteProduct.objects.filter(seller_id=seller.id).update(
+            seller_name=f"{seller.first_name} {seller.last_name}".strip(),
+            seller_rating=profile.get('average_rating', 0.0),
+            seller_verified=profile.get('is_verified', False)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_wasteproduct_primary_image_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wasteproduct',
+            name='seller_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='wasteproduct',
+            name='seller_rating',
+            field=models.FloatField(db_index=True, default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='wasteproduct',
+            name='seller_verified',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_seller_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+from api.counters import expected_counters
+
+
+def populate_counters(apps, schema_editor):
+    MarketplaceCounter = apps.get_model('api', 'MarketplaceCounter')
+    counters = expected_counters(
+        apps.get_model('api', 'WasteProduct'),
+        apps.get_model('api', 'Category'),
+        apps.get_model('api', 'Interest'),
+        apps.get_model(*settings.AUTH_USER_MODEL.split('.')),
+    )
+    MarketplaceCounter.objects.bulk_create([
+        MarketplaceCounter(key=key, value=value) for key, value in counters.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_wasteproduct_seller_snapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketplaceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['key'],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_marketplacecounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wasteproduct',
+            index=models.Index(fields=['status', 'available_until'], name='api_product_status_until_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_wasteproduct_status_until_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fooditem',
+            index=models.Index(fields=['user', 'expiry_date'], name='api_food_user_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['interest', 'is_read', 'sender'], name='api_message_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewed_user', 'rating'], name='api_review_user_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['user', 'is_completed', 'due_date'], name='api_todo_user_done_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wasteproduct',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='api_product_status_new_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wasteproduct',
+            index=models.Index(fields=['seller', 'status'], name='api_product_seller_status_idx'),
+        ),
+    ]
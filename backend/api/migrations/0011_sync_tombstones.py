@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0010_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(choices=[('food_item', 'Food item'), ('recipe', 'Recipe'), ('todo', 'Todo')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='fooditem',
+            index=models.Index(fields=['user', 'updated_at'], name='api_food_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'updated_at'], name='api_recipe_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['user', 'updated_at'], name='api_todo_user_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='deletedrecord',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deleted_records', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='deletedrecord',
+            index=models.Index(fields=['user', 'deleted_at'], name='api_deleted_user_at_idx'),
+        ),
+    ]
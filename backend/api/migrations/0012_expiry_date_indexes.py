@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fooditem',
+            name='expiry_date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='todo',
+            name='due_date',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
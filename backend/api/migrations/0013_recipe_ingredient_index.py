@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from api.ingredients import recipe_terms
+
+
+def build_ingredient_index(apps, schema_editor):
+    Recipe = apps.get_model('api', 'Recipe')
+    Ingredient = apps.get_model('api', 'Ingredient')
+    RecipeIngredient = apps.get_model('api', 'RecipeIngredient')
+
+    recipes = [
+        (recipe_id, user_id, recipe_terms(ingredients))
+        for recipe_id, user_id, ingredients in Recipe.objects.values_list('id', 'user_id', 'ingredients')
+    ]
+    names = set().union(*(terms for _, _, terms in recipes))
+    Ingredient.objects.bulk_create([Ingredient(name=name) for name in sorted(names)], batch_size=1000)
+    vocabulary = dict(Ingredient.objects.values_list('name', 'id'))
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe_id=recipe_id, user_id=user_id, ingredient_id=vocabulary[name])
+        for recipe_id, user_id, terms in recipes
+        for name in terms
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0012_expiry_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_index', to='api.ingredient')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredient_index', to='api.recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'ingredient', 'recipe'], name='api_recipeingr_lookup_idx')],
+                'unique_together': {('recipe', 'ingredient')},
+            },
+        ),
+        migrations.RunPython(build_ingredient_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_recipe_ingredient_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooditem',
+            name='quantity_amount',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='quantity_unit',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='wasteproduct',
+            name='quantity_amount',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='wasteproduct',
+            name='quantity_unit',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='fooditem',
+            index=models.Index(fields=['quantity_unit', 'quantity_amount'], name='api_food_quantity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wasteproduct',
+            index=models.Index(fields=['quantity_unit', 'quantity_amount'], name='api_product_quantity_idx'),
+        ),
+    ]
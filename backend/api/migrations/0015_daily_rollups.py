@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0014_parsed_quantities'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUserRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('food_consumed', models.IntegerField(default=0)),
+                ('food_consumed_kg', models.FloatField(default=0)),
+                ('food_wasted', models.IntegerField(default=0)),
+                ('food_wasted_kg', models.FloatField(default=0)),
+                ('products_sold', models.IntegerField(default=0)),
+                ('waste_sold_kg', models.FloatField(default=0)),
+                ('products_bought', models.IntegerField(default=0)),
+                ('waste_bought_kg', models.FloatField(default=0)),
+                ('products_expired', models.IntegerField(default=0)),
+                ('waste_expired_kg', models.FloatField(default=0)),
+                ('carbon_saved_kg', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCategoryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('products_sold', models.IntegerField(default=0)),
+                ('waste_sold_kg', models.FloatField(default=0)),
+                ('products_bought', models.IntegerField(default=0)),
+                ('waste_bought_kg', models.FloatField(default=0)),
+                ('products_expired', models.IntegerField(default=0)),
+                ('waste_expired_kg', models.FloatField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='api.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_category_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'date', 'category'],
+                'indexes': [models.Index(fields=['user', 'date'], name='api_catrollup_user_date_idx')],
+                'unique_together': {('user', 'category', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from api.conversations import message_preview
+
+
+def build_conversation_summaries(apps, schema_editor):
+    Interest = apps.get_model('api', 'Interest')
+    Message = apps.get_model('api', 'Message')
+    ConversationSummary = apps.get_model('api', 'ConversationSummary')
+
+    # One pass in message order leaves the latest message per interest
+    last_messages = {}
+    for interest_id, content, sender_id, created_at in Message.objects.order_by(
+        'interest_id', 'created_at', 'id'
+    ).values_list('interest_id', 'content', 'sender_id', 'created_at').iterator(chunk_size=2000):
+        last_messages[interest_id] = (content, sender_id, created_at)
+    unread = {
+        (interest_id, sender_id): count
+        for interest_id, sender_id, count in Message.objects.filter(is_read=False).order_by().values(
+            'interest_id', 'sender_id'
+        ).annotate(count=models.Count('id')).values_list('interest_id', 'sender_id', 'count')
+    }
+
+    summaries = []
+    for interest_id, buyer_id, seller_id, created_at in Interest.objects.values_list(
+        'id', 'buyer_id', 'product__seller_id', 'created_at'
+    ).iterator(chunk_size=2000):
+        content, sender_id, last_message_at = last_messages.get(interest_id, ('', None, None))
+        for user_id, other_user_id in [(buyer_id, seller_id), (seller_id, buyer_id)]:
+            summaries.append(ConversationSummary(
+                interest_id=interest_id, user_id=user_id, other_user_id=other_user_id,
+                last_message_preview=message_preview(content),
+                last_message_sender_id=sender_id,
+                last_message_at=last_message_at,
+                last_activity_at=last_message_at or created_at,
+                unread_count=unread.get((interest_id, other_user_id), 0)
+            ))
+    ConversationSummary.objects.bulk_create(summaries, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0015_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_preview', models.CharField(blank=True, default='', max_length=255)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('last_activity_at', models.DateTimeField()),
+                ('unread_count', models.IntegerField(default=0)),
+                ('interest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='api.interest')),
+                ('last_message_sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('other_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-last_activity_at', '-id'],
+                'indexes': [models.Index(fields=['user', '-last_activity_at', '-id'], name='api_convsummary_inbox_idx')],
+                'unique_together': {('interest', 'user')},
+            },
+        ),
+        migrations.RunPython(build_conversation_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_conversation_summaries'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['interest', 'created_at', 'id'], name='api_message_history_idx'),
+        ),
+    ]
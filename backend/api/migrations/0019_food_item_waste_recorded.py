@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_message_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooditem',
+            name='waste_recorded',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='fooditem',
+            index=models.Index(condition=models.Q(('waste_recorded', False)), fields=['expiry_date'], name='api_food_unrecorded_idx'),
+        ),
+    ]
@@ -4,6 +4,8 @@ from django.utils import timezone
 from datetime import date, timedelta
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
+from .geo import encode_geohash
+from .quantities import parse_quantity
 
 User = get_user_model()
 
@@ -12,16 +14,36 @@ class FoodItem(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='food_items')
     name = models.CharField(max_length=255)
     quantity = models.CharField(max_length=100)
-    expiry_date = models.DateField()
+    # Parsed from quantity on save, see api.quantities
+    quantity_amount = models.FloatField(null=True, blank=True, editable=False)
+    quantity_unit = models.CharField(max_length=20, blank=True, default='', editable=False)
+    expiry_date = models.DateField(db_index=True)
+    # Set once the expiry sweep has counted the item as wasted, see api.rollups
+    waste_recorded = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['expiry_date', 'name']
+        indexes = [
+            models.Index(fields=['user', 'expiry_date'], name='api_food_user_expiry_idx'),
+            models.Index(fields=['user', 'updated_at'], name='api_food_user_updated_idx'),
+            models.Index(fields=['quantity_unit', 'quantity_amount'], name='api_food_quantity_idx'),
+            models.Index(
+                fields=['expiry_date'], condition=models.Q(waste_recorded=False), name='api_food_unrecorded_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.quantity}"
     
+    def save(self, *args, **kwargs):
+        self.quantity_amount, self.quantity_unit = parse_quantity(self.quantity)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'quantity' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'quantity_amount', 'quantity_unit'}
+        super().save(*args, **kwargs)
+    
     @property
     def is_expired(self):
         return self.expiry_date < date.today()
@@ -61,6 +83,9 @@ class Recipe(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='api_recipe_user_updated_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -83,6 +108,34 @@ class Recipe(models.Model):
             return f"{hours}h {minutes}m"
 
 
+class Ingredient(models.Model):
+    """Normalized ingredient vocabulary term, see api.ingredients"""
+    name = models.CharField(max_length=100, unique=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class RecipeIngredient(models.Model):
+    """Inverted index row: a recipe uses an ingredient term"""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='ingredient_index')
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE, related_name='recipe_index')
+    # Copied from the recipe so pantry matching stays within one index
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    
+    class Meta:
+        unique_together = ['recipe', 'ingredient']
+        indexes = [
+            models.Index(fields=['user', 'ingredient', 'recipe'], name='api_recipeingr_lookup_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.recipe_id} uses {self.ingredient_id}"
+
+
 class Todo(models.Model):
     PRIORITY_CHOICES = [
         ('low', 'Low'),
@@ -95,13 +148,17 @@ class Todo(models.Model):
     description = models.TextField(blank=True)
     is_completed = models.BooleanField(default=False)
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
-    due_date = models.DateTimeField(null=True, blank=True)
+    due_date = models.DateTimeField(null=True, blank=True, db_index=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_completed', 'due_date'], name='api_todo_user_done_due_idx'),
+            models.Index(fields=['user', 'updated_at'], name='api_todo_user_updated_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -124,7 +181,30 @@ class Todo(models.Model):
             self.completed_at = timezone.now()
         else:
             self.completed_at = None
-        self.save()
+        self.save(update_fields=['is_completed', 'completed_at', 'updated_at'])
+
+
+class DeletedRecord(models.Model):
+    """Tombstone for a deleted personal record, served by the sync endpoint"""
+    MODEL_CHOICES = [
+        ('food_item', 'Food item'),
+        ('recipe', 'Recipe'),
+        ('todo', 'Todo'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='deleted_records')
+    model_name = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='api_deleted_user_at_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.model_name} {self.object_id} deleted"
 
 
 # Marketplace Models
@@ -166,6 +246,9 @@ class WasteProduct(models.Model):
     is_free = models.BooleanField(default=False)
     quantity = models.CharField(max_length=100)
     unit = models.CharField(max_length=50, default='kg')
+    # Parsed from quantity and unit on save, see api.quantities
+    quantity_amount = models.FloatField(null=True, blank=True, editable=False)
+    quantity_unit = models.CharField(max_length=20, blank=True, default='', editable=False)
     condition = models.CharField(max_length=20, choices=CONDITION_CHOICES, default='good')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
     
@@ -173,6 +256,7 @@ class WasteProduct(models.Model):
     location = models.CharField(max_length=255)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
     
     # Timing
     available_from = models.DateTimeField(default=timezone.now)
@@ -185,15 +269,60 @@ class WasteProduct(models.Model):
     estimated_weight = models.FloatField(help_text="Estimated weight in kg", default=0)
     carbon_footprint_saved = models.FloatField(default=0, help_text="Estimated CO2 saved in kg")
     
+    # Seller snapshot, refreshed when the seller's User or UserProfile changes
+    seller_name = models.CharField(max_length=255, blank=True, default='', editable=False)
+    seller_rating = models.FloatField(default=0.0, db_index=True, editable=False)
+    seller_verified = models.BooleanField(default=False, editable=False)
+    
+    # Denormalized from ProductImage so listings need no image queries
+    primary_image_url = models.CharField(max_length=500, blank=True, default='', editable=False)
+    primary_thumbnail_url = models.CharField(max_length=500, blank=True, default='', editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Default listing: available products, newest first
+            models.Index(fields=['status', '-created_at', '-id'], name='api_product_status_new_idx'),
+            models.Index(fields=['seller', 'status'], name='api_product_seller_status_idx'),
+            # Drives the expiry sweep: available rows past their window
+            models.Index(fields=['status', 'available_until'], name='api_product_status_until_idx'),
+            models.Index(fields=['quantity_unit', 'quantity_amount'], name='api_product_quantity_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} by {self.seller.full_name}"
     
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.refresh_seller_snapshot()
+        # Keep the grid-cell index in step with the coordinates
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        self.quantity_amount, self.quantity_unit = parse_quantity(self.quantity, default_unit=self.unit)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if {'latitude', 'longitude'} & update_fields:
+                update_fields.add('geohash')
+            if {'quantity', 'unit'} & update_fields:
+                update_fields |= {'quantity_amount', 'quantity_unit'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+    
+    def refresh_seller_snapshot(self):
+        """Copy the seller's display name, rating and verification onto the product"""
+        self.seller_name = self.seller.full_name
+        profile = UserProfile.objects.filter(user_id=self.seller_id).values(
+            'average_rating', 'is_verified'
+        ).first()
+        self.seller_rating = profile['average_rating'] if profile else 0.0
+        self.seller_verified = profile['is_verified'] if profile else False
+    
     @property
     def is_available(self):
         return self.status == 'available' and (
@@ -253,15 +382,47 @@ class Message(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
     is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Send time; set by the caller for chat messages inserted later in batches
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Unread counts: messages in a conversation not sent by the reader
+            models.Index(fields=['interest', 'is_read', 'sender'], name='api_message_unread_idx'),
+            # Chat history pages: a range on (created_at, id) within one conversation
+            models.Index(fields=['interest', 'created_at', 'id'], name='api_message_history_idx'),
+        ]
     
     def __str__(self):
         return f"Message from {self.sender.full_name}"
 
 
+class ConversationSummary(models.Model):
+    """One participant's inbox entry for an interest, maintained by api.conversations"""
+    interest = models.ForeignKey(Interest, on_delete=models.CASCADE, related_name='summaries')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_summaries')
+    other_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    last_message_preview = models.CharField(max_length=255, blank=True, default='')
+    last_message_sender = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    # Last message time, or the interest's creation time before any message
+    last_activity_at = models.DateTimeField()
+    unread_count = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-last_activity_at', '-id']
+        unique_together = ['interest', 'user']
+        indexes = [
+            models.Index(fields=['user', '-last_activity_at', '-id'], name='api_convsummary_inbox_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Conversation {self.interest_id} for {self.user_id}"
+
+
 class Review(models.Model):
     RATING_CHOICES = [(i, i) for i in range(1, 6)]
     
@@ -275,6 +436,9 @@ class Review(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['reviewer', 'reviewed_user', 'product']
+        indexes = [
+            models.Index(fields=['reviewed_user', 'rating'], name='api_review_user_rating_idx'),
+        ]
     
     def __str__(self):
         return f"{self.rating}★ review for {self.reviewed_user.full_name}"
@@ -354,4 +518,69 @@ class Report(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"Report by {self.reporter.full_name}: {self.reason}"
\ No newline at end of file
+        return f"Report by {self.reporter.full_name}: {self.reason}"
+
+
+class MarketplaceCounter(models.Model):
+    """Materialized marketplace total, maintained incrementally from model signals"""
+    key = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['key']
+    
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+class DailyUserRollup(models.Model):
+    """Per-user daily sustainability totals, maintained incrementally by api.rollups"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_rollups')
+    date = models.DateField()
+    
+    # Personal pantry: removed before expiry vs. after it
+    food_consumed = models.IntegerField(default=0)
+    food_consumed_kg = models.FloatField(default=0)
+    food_wasted = models.IntegerField(default=0)
+    food_wasted_kg = models.FloatField(default=0)
+    
+    # Marketplace
+    products_sold = models.IntegerField(default=0)
+    waste_sold_kg = models.FloatField(default=0)
+    products_bought = models.IntegerField(default=0)
+    waste_bought_kg = models.FloatField(default=0)
+    products_expired = models.IntegerField(default=0)
+    waste_expired_kg = models.FloatField(default=0)
+    carbon_saved_kg = models.FloatField(default=0)
+    
+    class Meta:
+        ordering = ['user', 'date']
+        unique_together = ['user', 'date']
+    
+    def __str__(self):
+        return f"{self.user} on {self.date}"
+
+
+class DailyCategoryRollup(models.Model):
+    """Per-user, per-category daily marketplace totals, maintained by api.rollups"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_category_rollups')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_rollups')
+    date = models.DateField()
+    
+    products_sold = models.IntegerField(default=0)
+    waste_sold_kg = models.FloatField(default=0)
+    products_bought = models.IntegerField(default=0)
+    waste_bought_kg = models.FloatField(default=0)
+    products_expired = models.IntegerField(default=0)
+    waste_expired_kg = models.FloatField(default=0)
+    
+    class Meta:
+        ordering = ['user', 'date', 'category']
+        unique_together = ['user', 'category', 'date']
+        indexes = [
+            models.Index(fields=['user', 'date'], name='api_catrollup_user_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} / {self.category} on {self.date}"
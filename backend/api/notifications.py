@@ -0,0 +1,106 @@
+"""
+Server-side expiry alerts pushed over the channel layer.
+
+Each sweep reads food items expiring within a window and todos due today
+with indexed range queries, groups them per user and sends every user one
+batched notification through their ``NotificationConsumer`` group. A user is
+only alerted again the same day if their set of items changed.
+"""
+import asyncio
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.utils import timezone
+
+from .consumers import send_notification_to_user
+from .models import FoodItem, Todo
+
+DEFAULT_EXPIRY_WINDOW_DAYS = 3
+NOTIFIED_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def collect_expiry_alerts(today=None, days=DEFAULT_EXPIRY_WINDOW_DAYS):
+    """Return {user_id: {'food_items': [...], 'todos': [...]}} for the window"""
+    today = today or date.today()
+    alerts = {}
+
+    food_items = FoodItem.objects.filter(
+        expiry_date__gte=today,
+        expiry_date__lte=today + timedelta(days=days)
+    ).order_by('user_id', 'expiry_date', 'id').values_list('user_id', 'id', 'name', 'expiry_date')
+    for user_id, rows in groupby(food_items.iterator(chunk_size=2000), key=lambda row: row[0]):
+        alerts.setdefault(user_id, {'food_items': [], 'todos': []})['food_items'] = [
+            {
+                'id': item_id,
+                'name': name,
+                'expiry_date': expiry_date.isoformat(),
+                'days_until_expiry': (expiry_date - today).days,
+            }
+            for _, item_id, name, expiry_date in rows
+        ]
+
+    start_of_day = timezone.make_aware(datetime.combine(today, time.min))
+    todos = Todo.objects.filter(
+        due_date__gte=start_of_day,
+        due_date__lt=start_of_day + timedelta(days=1),
+        is_completed=False
+    ).order_by('user_id', 'due_date', 'id').values_list('user_id', 'id', 'title', 'due_date')
+    for user_id, rows in groupby(todos.iterator(chunk_size=2000), key=lambda row: row[0]):
+        alerts.setdefault(user_id, {'food_items': [], 'todos': []})['todos'] = [
+            {'id': todo_id, 'title': title, 'due_date': due_date.isoformat()}
+            for _, todo_id, title, due_date in rows
+        ]
+
+    return alerts
+
+
+def build_notification(alert):
+    food_count = len(alert['food_items'])
+    todo_count = len(alert['todos'])
+    parts = []
+    if food_count:
+        parts.append(f"{food_count} food item{'s' if food_count != 1 else ''} expiring soon")
+    if todo_count:
+        parts.append(f"{todo_count} todo{'s' if todo_count != 1 else ''} due today")
+    return {
+        'type': 'expiry_alert',
+        'title': 'Expiry reminder',
+        'message': ' and '.join(parts),
+        'food_items': alert['food_items'],
+        'todos': alert['todos'],
+        'created_at': timezone.now().isoformat(),
+    }
+
+
+def _notified_key(user_id, today):
+    return f'expiry_notified:{user_id}:{today.isoformat()}'
+
+
+async def _fan_out(notifications):
+    await asyncio.gather(*(
+        send_notification_to_user(user_id, notification)
+        for user_id, notification in notifications.items()
+    ))
+
+
+def send_expiry_notifications(today=None, days=DEFAULT_EXPIRY_WINDOW_DAYS):
+    """Send one batched alert per user with new items; returns the number sent"""
+    today = today or date.today()
+    notifications = {}
+    signatures = {}
+    for user_id, alert in collect_expiry_alerts(today, days).items():
+        signature = (
+            tuple(item['id'] for item in alert['food_items']),
+            tuple(todo['id'] for todo in alert['todos']),
+        )
+        if cache.get(_notified_key(user_id, today)) == signature:
+            continue
+        notifications[user_id] = build_notification(alert)
+        signatures[_notified_key(user_id, today)] = signature
+
+    if notifications:
+        async_to_sync(_fan_out)(notifications)
+        cache.set_many(signatures, NOTIFIED_CACHE_TIMEOUT)
+    return len(notifications)
@@ -0,0 +1,142 @@
+"""
+Pagination classes for list endpoints.
+
+List endpoints use keyset (cursor) pagination, so no ``COUNT(*)`` or
+``OFFSET`` is issued. The cursor holds the values of every ordering column of
+the last row served, the primary key included, and the next page is the rows
+after that tuple: ``(a, b, id) > (va, vb, vid)`` written out as
+``a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND id > vid)``, since
+Django has no row-value lookup. Ties on low-cardinality columns such as
+``priority`` are therefore paged by the later columns, not stepped over by an
+offset. Ordering columns must be non-nullable: NULL never compares equal, so
+the rows that hold one cannot be paged past.
+"""
+import datetime
+import decimal
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.settings import api_settings
+
+
+def _reversed(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+def _cursor_value(value):
+    # isoformat keeps microseconds and the offset, which the lookups parse back
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+class StableCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the view's ordering.
+
+    ``?ordering=`` and the view's default ordering are honoured, with the
+    primary key appended as a tiebreaker so that every ordering is total and
+    every row has a distinct cursor position.
+    Views must not offer nullable fields in ``ordering_fields``.
+    Full-text search results are paged in relevance order unless the client
+    asked for an explicit ordering.
+    """
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        explicit = request.query_params.get(api_settings.ORDERING_PARAM)
+        if not explicit and 'search_rank' in queryset.query.annotations:
+            ordering = ('-search_rank',)
+        elif explicit or getattr(view, 'ordering', None):
+            ordering = super().get_ordering(request, queryset, view)
+        else:
+            ordering = self.ordering
+
+        ordering = tuple(ordering)
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering += ('-id',) if ordering[0].startswith('-') else ('id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = self.cursor.position if self.cursor is not None else None
+
+        queryset = queryset.order_by(*(_reversed(self.ordering) if reverse else self.ordering))
+        if current_position is not None:
+            queryset = queryset.filter(self._after(json.loads(current_position), reverse))
+
+        # One extra row tells whether there is a page after this one
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = following_position is not None
+            self.next_position, self.previous_position = current_position, following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position, self.previous_position = following_position, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            values = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering) or None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def _after(self, values, reverse):
+        """Rows strictly after ``values`` in the (possibly reversed) ordering"""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        # Redundant bound on the leading column so its index can be used
+        first = self.ordering[0].lstrip('-')
+        lookup = 'lte' if self.ordering[0].startswith('-') != reverse else 'gte'
+        return Q(**{f'{first}__{lookup}': values[0]}) & condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            values.append(_cursor_value(instance[name] if isinstance(instance, dict) else getattr(instance, name)))
+        return json.dumps(values)
+
+
+class RankedListPagination(PageNumberPagination):
+    """Pages over an already ranked in-memory list, e.g. distance results"""
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,132 @@
+"""
+Parsing of free-text quantities into a numeric amount and a normalized unit.
+
+"500g", "1 kg", "1½ cups", "2 x 400g" and "2 bunches" become (500.0, 'g'),
+(1000.0, 'g'), (360.0, 'ml'), (800.0, 'g') and (2.0, 'bunch'). Mass is
+stored in grams, volume in millilitres and counts in pieces, so amounts of
+the same unit can be summed, compared and range-filtered in SQL. Strings that
+cannot be read completely, such as "1.5.2", "1e5 g" or "2 large onions",
+give (None, '') rather than a guess.
+"""
+import re
+from fractions import Fraction
+
+GRAMS = 'g'
+MILLILITRES = 'ml'
+PIECES = 'pcs'
+
+# alias -> (normalized unit, factor to the normalized unit)
+UNIT_ALIASES = {}
+for _unit, _factor, _aliases in [
+    (GRAMS, 1, ['g', 'gr', 'gram', 'grams', 'gm', 'gms']),
+    (GRAMS, 1000, ['kg', 'kgs', 'kilo', 'kilos', 'kilogram', 'kilograms']),
+    (GRAMS, 0.001, ['mg', 'milligram', 'milligrams']),
+    (GRAMS, 1000000, ['t', 'tonne', 'tonnes', 'ton', 'tons']),
+    (GRAMS, 453.592, ['lb', 'lbs', 'pound', 'pounds']),
+    (GRAMS, 28.3495, ['oz', 'ounce', 'ounces']),
+    (MILLILITRES, 1, ['ml', 'millilitre', 'millilitres', 'milliliter', 'milliliters']),
+    (MILLILITRES, 10, ['cl']),
+    (MILLILITRES, 100, ['dl']),
+    (MILLILITRES, 1000, ['l', 'ltr', 'ltrs', 'litre', 'litres', 'liter', 'liters']),
+    (MILLILITRES, 240, ['cup', 'cups']),
+    (MILLILITRES, 15, ['tbsp', 'tbs', 'tablespoon', 'tablespoons']),
+    (MILLILITRES, 5, ['tsp', 'teaspoon', 'teaspoons']),
+    (MILLILITRES, 3785.41, ['gal', 'gallon', 'gallons']),
+    (PIECES, 1, ['pc', 'pcs', 'piece', 'pieces', 'item', 'items', 'unit', 'units', 'each', 'ea']),
+    (PIECES, 12, ['dozen', 'dz']),
+    (PIECES, 2, ['pair', 'pairs']),
+]:
+    for _alias in _aliases:
+        UNIT_ALIASES[_alias] = (_unit, _factor)
+
+# Containers keep their own unit, singular
+CONTAINER_UNITS = {
+    'bunch', 'pack', 'packet', 'bag', 'box', 'can', 'tin', 'jar', 'bottle', 'crate',
+    'sack', 'tray', 'loaf', 'head', 'bulb', 'carton', 'basket', 'bucket', 'bundle',
+}
+# Plurals that dropping "s" or "es" does not singularize
+CONTAINER_PLURALS = {'loaves': 'loaf'}
+
+UNICODE_FRACTIONS = {
+    '¼': '1/4', '½': '1/2', '¾': '3/4', '⅓': '1/3', '⅔': '2/3',
+    '⅕': '1/5', '⅛': '1/8', '⅜': '3/8', '⅝': '5/8', '⅞': '7/8',
+}
+
+# Mixed fraction, fraction, comma-grouped thousands ("12,345.6") or a plain
+# number with a decimal point or comma; a comma before exactly three digits
+# is read as a thousands separator
+_THOUSANDS = r'\d{1,3}(?:,\d{3})+(?:\.\d+)?'
+_NUMBER = rf'\d+\s+\d+/\d+|\d+/\d+|{_THOUSANDS}(?![.,]?\d)|\d+(?:[.,]\d+)?'
+_QUANTITY_RE = re.compile(
+    rf'^\s*(?:(?P<count>\d+)\s*[x×*]\s*)?'
+    rf'(?P<amount>{_NUMBER})(?:\s*(?:-|to)\s*(?:{_NUMBER}))?'
+    rf'\s*(?P<unit>[^\W\d_]+\.?)?\s*$',
+    re.IGNORECASE
+)
+_THOUSANDS_RE = re.compile(_THOUSANDS)
+
+
+def _to_number(text):
+    if _THOUSANDS_RE.fullmatch(text):
+        text = text.replace(',', '')
+    else:
+        text = text.replace(',', '.')
+    if ' ' in text:
+        whole, fraction = text.split()
+        return float(int(whole) + Fraction(fraction))
+    return float(Fraction(text))
+
+
+def _normalize_unit(unit):
+    unit = unit.lower().rstrip('.')
+    if unit in UNIT_ALIASES:
+        return UNIT_ALIASES[unit]
+    if unit in CONTAINER_PLURALS:
+        return CONTAINER_PLURALS[unit], 1
+    singular = unit[:-2] if unit.endswith('es') and unit[:-2] in CONTAINER_UNITS else unit.rstrip('s')
+    if singular in CONTAINER_UNITS:
+        return singular, 1
+    # "3 medium", "2 bananas": a plain count of things
+    return PIECES, 1
+
+
+def parse_quantity(text, default_unit=None):
+    """
+    Return (amount, unit) for a quantity string. ``default_unit`` is used
+    when the string is a bare number, e.g. WasteProduct.quantity with its
+    separate ``unit`` field.
+    """
+    if not text:
+        return None, ''
+    for symbol, fraction in UNICODE_FRACTIONS.items():
+        text = text.replace(symbol, f' {fraction}')
+    match = _QUANTITY_RE.match(text)
+    if not match:
+        return None, ''
+    try:
+        amount = _to_number(match.group('amount').strip())
+    except (ValueError, ZeroDivisionError):
+        return None, ''
+    if match.group('count'):
+        amount *= int(match.group('count'))
+
+    unit = match.group('unit') or default_unit
+    unit, factor = _normalize_unit(unit) if unit else (PIECES, 1)
+    return round(amount * factor, 4), unit
+
+
+def parse_quantities(texts, default_units=None):
+    """
+    Parse many quantity strings at once. Each distinct (text, default unit)
+    pair is parsed once, which matters for columns full of repeats like "1kg".
+    """
+    if default_units is None:
+        default_units = [None] * len(texts)
+    parsed = {}
+    results = []
+    for text, default_unit in zip(texts, default_units):
+        key = ((text or '').strip().lower(), default_unit)
+        if key not in parsed:
+            parsed[key] = parse_quantity(key[0], default_unit)
+        results.append(parsed[key])
+    return results
@@ -0,0 +1,152 @@
+"""
+Daily sustainability rollups.
+
+``DailyUserRollup`` and ``DailyCategoryRollup`` rows accumulate what each user
+consumed, wasted, sold, bought and let expire per day. They are written
+incrementally with ``F()`` deltas at the moment something happens, so the
+analytics endpoint reads at most a year of small per-day rows instead of
+scanning food items, products and interests:
+
+- a food item deleted before its expiry date counts as consumed today. One
+  still in the pantry after its expiry date counts as wasted on the day it
+  expired, recorded by the daily expiry sweep or by its deletion, whichever
+  comes first (``FoodItem.waste_recorded``);
+- a completed interest counts as sold for the seller and bought for the
+  buyer, and credits both with the product's carbon saving. The lifetime
+  totals on ``UserProfile`` are moved by the same amounts;
+- a marketplace listing that expires counts against its seller.
+
+Rollups are history: deleting a product or interest later does not undo them.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.db.models import F
+
+USER_ROLLUP_FIELDS = [
+    'food_consumed', 'food_consumed_kg', 'food_wasted', 'food_wasted_kg',
+    'products_sold', 'waste_sold_kg', 'products_bought', 'waste_bought_kg',
+    'products_expired', 'waste_expired_kg', 'carbon_saved_kg',
+]
+CATEGORY_ROLLUP_FIELDS = [
+    'products_sold', 'waste_sold_kg', 'products_bought', 'waste_bought_kg',
+    'products_expired', 'waste_expired_kg',
+]
+
+
+def add_to_rollup(model, day, deltas, **keys):
+    """Atomically add ``deltas`` to the rollup row for ``keys`` and ``day``, creating it if needed"""
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    rows = model.objects.filter(date=day, **keys)
+    if not rows.update(**updates):
+        model.objects.get_or_create(date=day, **keys)
+        rows.update(**updates)
+
+
+def _food_weight_kg(quantity_amount, quantity_unit):
+    # Only mass quantities say anything about weight
+    if quantity_amount is None or quantity_unit != 'g':
+        return 0
+    return quantity_amount / 1000
+
+
+def record_removed_food_items(rows, today=None):
+    """
+    Record food items leaving the pantry. ``rows`` yields (user_id,
+    expiry_date, quantity_amount, quantity_unit, waste_recorded); items the
+    expiry sweep already counted are skipped.
+    """
+    from .models import DailyUserRollup
+
+    today = today or date.today()
+    totals = defaultdict(lambda: defaultdict(float))
+    for user_id, expiry_date, quantity_amount, quantity_unit, waste_recorded in rows:
+        if waste_recorded:
+            continue
+        weight = _food_weight_kg(quantity_amount, quantity_unit)
+        if expiry_date < today:
+            deltas = totals[(user_id, expiry_date)]
+            deltas['food_wasted'] += 1
+            deltas['food_wasted_kg'] += weight
+        else:
+            deltas = totals[(user_id, today)]
+            deltas['food_consumed'] += 1
+            deltas['food_consumed_kg'] += weight
+    for (user_id, day), deltas in totals.items():
+        add_to_rollup(DailyUserRollup, day, deltas, user_id=user_id)
+
+
+def record_wasted_food_items(rows):
+    """
+    Record food items that expired in the pantry on their expiry date.
+    ``rows`` yields (user_id, expiry_date, quantity_amount, quantity_unit).
+    """
+    from .models import DailyUserRollup
+
+    totals = defaultdict(lambda: defaultdict(float))
+    for user_id, expiry_date, quantity_amount, quantity_unit in rows:
+        deltas = totals[(user_id, expiry_date)]
+        deltas['food_wasted'] += 1
+        deltas['food_wasted_kg'] += _food_weight_kg(quantity_amount, quantity_unit)
+    for (user_id, day), deltas in totals.items():
+        add_to_rollup(DailyUserRollup, day, deltas, user_id=user_id)
+
+
+def record_transaction(interest, sign=1, today=None):
+    """
+    Record an interest moving into (``sign=1``) or back out of (``sign=-1``)
+    the completed state.
+    """
+    from .models import DailyCategoryRollup, DailyUserRollup, UserProfile
+
+    today = today or date.today()
+    product = interest.product
+    weight = product.estimated_weight * sign
+    carbon = product.carbon_footprint_saved * sign
+    seller_id, buyer_id = product.seller_id, interest.buyer_id
+
+    add_to_rollup(DailyUserRollup, today, {
+        'products_sold': sign, 'waste_sold_kg': weight, 'carbon_saved_kg': carbon,
+    }, user_id=seller_id)
+    add_to_rollup(DailyUserRollup, today, {
+        'products_bought': sign, 'waste_bought_kg': weight, 'carbon_saved_kg': carbon,
+    }, user_id=buyer_id)
+    add_to_rollup(DailyCategoryRollup, today, {
+        'products_sold': sign, 'waste_sold_kg': weight,
+    }, user_id=seller_id, category_id=product.category_id)
+    add_to_rollup(DailyCategoryRollup, today, {
+        'products_bought': sign, 'waste_bought_kg': weight,
+    }, user_id=buyer_id, category_id=product.category_id)
+
+    UserProfile.objects.filter(user_id=seller_id).update(
+        total_waste_sold=F('total_waste_sold') + weight,
+        carbon_footprint_saved=F('carbon_footprint_saved') + carbon,
+        total_transactions=F('total_transactions') + sign
+    )
+    UserProfile.objects.filter(user_id=buyer_id).update(
+        total_waste_bought=F('total_waste_bought') + weight,
+        carbon_footprint_saved=F('carbon_footprint_saved') + carbon,
+        total_transactions=F('total_transactions') + sign
+    )
+
+
+def record_expired_products(rows, today=None):
+    """
+    Record expired marketplace listings. ``rows`` yields (seller_id,
+    category_id, count, weight_kg).
+    """
+    from .models import DailyCategoryRollup, DailyUserRollup
+
+    today = today or date.today()
+    totals = defaultdict(lambda: [0, 0.0])
+    for seller_id, category_id, count, weight in rows:
+        deltas = {'products_expired': count, 'waste_expired_kg': weight or 0}
+        add_to_rollup(DailyCategoryRollup, today, deltas, user_id=seller_id, category_id=category_id)
+        totals[seller_id][0] += count
+        totals[seller_id][1] += weight or 0
+    for seller_id, (count, weight) in totals.items():
+        add_to_rollup(DailyUserRollup, today, {
+            'products_expired': count, 'waste_expired_kg': weight,
+        }, user_id=seller_id)
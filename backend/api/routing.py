@@ -1,10 +1,14 @@
 """
 WebSocket routing for marketplace chat functionality
+
+``ws/stream/`` multiplexes chat and notifications over one connection; the
+per-conversation and per-user endpoints remain for existing clients.
 """
 from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
-    re_path(r'ws/chat/(?P<product_id>\w+)/$', consumers.ChatConsumer.as_asgi()),
+    re_path(r'ws/stream/$', consumers.StreamConsumer.as_asgi()),
+    re_path(r'ws/chat/(?P<interest_id>\d+)/$', consumers.ChatConsumer.as_asgi()),
     re_path(r'ws/notifications/(?P<user_id>\w+)/$', consumers.NotificationConsumer.as_asgi()),
 ]
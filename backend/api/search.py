@@ -0,0 +1,113 @@
+"""
+Full-text search for marketplace products.
+
+On SQLite products are mirrored into an FTS5 table (``api_wasteproduct_fts``)
+that is kept current from model signals. On PostgreSQL the table carries a
+generated ``search_vector`` tsvector column with a GIN index, which the
+database keeps current by itself. Other backends fall back to DRF's
+``icontains`` search.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, BooleanField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+from .models import WasteProduct
+
+FTS_TABLE = 'api_wasteproduct_fts'
+SEARCH_VECTOR_COLUMN = 'search_vector'
+SEARCH_CONFIG = 'english'
+
+# Relative weight of a hit in each column
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+LOCATION_WEIGHT = 5.0
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_tokens(terms):
+    """Split search terms into plain word tokens safe to embed in a query"""
+    tokens = []
+    for term in terms:
+        tokens.extend(_TOKEN_RE.findall(term.lower()))
+    return tokens
+
+
+def index_product(product):
+    """Write a product's searchable text to the SQLite FTS table"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [product.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, location) VALUES (%s, %s, %s, %s)',
+            [product.pk, product.title, product.description, product.location]
+        )
+
+
+def unindex_product(product_id):
+    """Remove a product from the SQLite FTS table"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [product_id])
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Search backend that matches ``?search=`` against the full-text index and
+    annotates each row with ``search_rank`` (higher is more relevant). Results
+    are ordered by relevance unless the client asked for an explicit ordering.
+    Words are prefix-matched so search-as-you-type works on partial input.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            return super().filter_queryset(request, queryset, view)
+
+        tokens = search_tokens(terms)
+        if not tokens:
+            return queryset.none()
+        if connection.vendor == 'sqlite':
+            queryset = self._filter_sqlite(queryset, tokens)
+        else:
+            queryset = self._filter_postgresql(queryset, tokens)
+
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        return queryset.order_by('-search_rank', '-created_at')
+
+    def _filter_sqlite(self, queryset, tokens):
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        table = WasteProduct._meta.db_table
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}, %s, %s, %s) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+                (TITLE_WEIGHT, DESCRIPTION_WEIGHT, LOCATION_WEIGHT, match),
+                output_field=FloatField()
+            )
+        )
+
+    def _filter_postgresql(self, queryset, tokens):
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        column = f'"{WasteProduct._meta.db_table}"."{SEARCH_VECTOR_COLUMN}"'
+        return queryset.annotate(
+            search_match=RawSQL(
+                f"{column} @@ to_tsquery('{SEARCH_CONFIG}', %s)", (tsquery,),
+                output_field=BooleanField()
+            ),
+            search_rank=RawSQL(
+                f"ts_rank({column}, to_tsquery('{SEARCH_CONFIG}', %s))", (tsquery,),
+                output_field=FloatField()
+            )
+        ).filter(search_match=True)
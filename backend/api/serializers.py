@@ -2,7 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import (
     FoodItem, Recipe, Todo, WasteProduct, Category, ProductImage, 
-    Interest, Message, Review, UserProfile, Favorite, Report
+    Interest, Message, ConversationSummary, Review, UserProfile, Favorite, Report
 )
 
 User = get_user_model()
@@ -17,8 +17,8 @@ class FoodItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = FoodItem
         fields = [
-            'id', 'name', 'quantity', 'expiry_date', 'created_at', 'updated_at',
-            'is_expired', 'is_expiring_soon', 'days_until_expiry'
+            'id', 'name', 'quantity', 'quantity_amount', 'quantity_unit', 'expiry_date',
+            'created_at', 'updated_at', 'is_expired', 'is_expiring_soon', 'days_until_expiry'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
@@ -83,6 +83,26 @@ class TodoToggleSerializer(serializers.Serializer):
     pass
 
 
+class BulkActionSerializer(serializers.Serializer):
+    """An action applied to a list of the user's records at once"""
+    MAX_IDS = 1000
+    
+    action = serializers.ChoiceField(choices=['delete'])
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_IDS
+    )
+
+
+class TodoBulkActionSerializer(BulkActionSerializer):
+    action = serializers.ChoiceField(choices=['complete', 'uncomplete', 'set_priority', 'delete'])
+    priority = serializers.ChoiceField(choices=Todo.PRIORITY_CHOICES, required=False)
+    
+    def validate(self, attrs):
+        if attrs['action'] == 'set_priority' and 'priority' not in attrs:
+            raise serializers.ValidationError({'priority': 'This field is required for set_priority.'})
+        return attrs
+
+
 # Summary serializers for dashboard/overview
 class FoodItemSummarySerializer(serializers.ModelSerializer):
     class Meta:
@@ -138,8 +158,6 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
 
 class WasteProductSerializer(serializers.ModelSerializer):
-    seller_name = serializers.CharField(source='seller.full_name', read_only=True)
-    seller_rating = serializers.FloatField(source='seller.profile.average_rating', read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     is_available = serializers.ReadOnlyField()
@@ -149,15 +167,15 @@ class WasteProductSerializer(serializers.ModelSerializer):
         model = WasteProduct
         fields = [
             'id', 'title', 'description', 'category', 'category_name', 'price', 
-            'is_free', 'quantity', 'unit', 'condition', 'status', 'location',
-            'latitude', 'longitude', 'available_from', 'available_until',
+            'is_free', 'quantity', 'unit', 'quantity_amount', 'quantity_unit',
+            'condition', 'status', 'location', 'latitude', 'longitude', 'available_from', 'available_until',
             'pickup_available', 'delivery_available', 'delivery_radius',
             'estimated_weight', 'carbon_footprint_saved', 'seller', 'seller_name',
-            'seller_rating', 'images', 'is_available', 'is_expired',
+            'seller_rating', 'seller_verified', 'images', 'is_available', 'is_expired',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'seller', 'seller_name', 'seller_rating', 'category_name',
+            'id', 'seller', 'seller_name', 'seller_rating', 'seller_verified', 'category_name',
             'images', 'is_available', 'is_expired', 'created_at', 'updated_at'
         ]
     
@@ -167,26 +185,34 @@ class WasteProductSerializer(serializers.ModelSerializer):
 
 
 class WasteProductListSerializer(serializers.ModelSerializer):
-    seller_name = serializers.CharField(source='seller.full_name', read_only=True)
-    seller_rating = serializers.FloatField(source='seller.profile.average_rating', read_only=True)
     primary_image = serializers.SerializerMethodField()
+    primary_thumbnail = serializers.SerializerMethodField()
     category_name = serializers.CharField(source='category.name', read_only=True)
     
     class Meta:
         model = WasteProduct
         fields = [
             'id', 'title', 'price', 'is_free', 'quantity', 'unit', 'condition',
-            'status', 'location', 'seller_name', 'seller_rating', 'primary_image',
-            'category_name', 'estimated_weight', 'created_at'
+            'status', 'location', 'seller_name', 'seller_rating', 'seller_verified',
+            'primary_image', 'primary_thumbnail', 'category_name', 'estimated_weight', 'created_at'
         ]
     
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
-        if primary_image:
-            return primary_image.image.url
-        elif obj.images.exists():
-            return obj.images.first().image.url
-        return None
+        return obj.primary_image_url or None
+    
+    def get_primary_thumbnail(self, obj):
+        return obj.primary_thumbnail_url or None
+
+
+class NearbyWasteProductSerializer(WasteProductListSerializer):
+    distance_km = serializers.SerializerMethodField()
+    
+    class Meta(WasteProductListSerializer.Meta):
+        fields = WasteProductListSerializer.Meta.fields + ['latitude', 'longitude', 'distance_km']
+    
+    def get_distance_km(self, obj):
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 3) if distance is not None else None
 
 
 class InterestSerializer(serializers.ModelSerializer):
@@ -225,6 +251,36 @@ class MessageSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class ConversationSummarySerializer(serializers.ModelSerializer):
+    """Inbox entry; expects interest__product, other_user and last_message_sender to be selected"""
+    interest_id = serializers.IntegerField(read_only=True)
+    product_id = serializers.IntegerField(source='interest.product_id', read_only=True)
+    product_title = serializers.CharField(source='interest.product.title', read_only=True)
+    status = serializers.CharField(source='interest.status', read_only=True)
+    created_at = serializers.DateTimeField(source='interest.created_at', read_only=True)
+    other_user = serializers.SerializerMethodField()
+    latest_message = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ConversationSummary
+        fields = [
+            'interest_id', 'product_title', 'product_id', 'other_user', 'status',
+            'latest_message', 'unread_count', 'created_at', 'last_activity_at'
+        ]
+    
+    def get_other_user(self, obj):
+        return {'id': obj.other_user_id, 'name': obj.other_user.full_name}
+    
+    def get_latest_message(self, obj):
+        if obj.last_message_at is None:
+            return None
+        return {
+            'content': obj.last_message_preview,
+            'created_at': serializers.DateTimeField().to_representation(obj.last_message_at),
+            'sender_name': obj.last_message_sender.full_name if obj.last_message_sender else None,
+        }
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     reviewer_name = serializers.CharField(source='reviewer.full_name', read_only=True)
     reviewed_user_name = serializers.CharField(source='reviewed_user.full_name', read_only=True)
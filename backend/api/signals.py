@@ -0,0 +1,332 @@
+"""
+Model signal handlers that keep derived marketplace data in step with writes.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_init, post_save, post_delete
+from django.db.models import Count, Sum
+from django.dispatch import Signal, receiver
+
+from . import counters, conversations, rollups
+from .autocomplete import autocomplete_index
+from .cache import invalidate_dashboard, invalidate_listings
+from .images import refresh_primary_image
+from .ingredients import index_recipe
+from .models import (
+    FoodItem, Recipe, Todo, DeletedRecord,
+    WasteProduct, ProductImage, Category, Interest, Message, UserProfile, Favorite, MarketplaceCounter
+)
+from .search import index_product, unindex_product
+from .spatial import coordinate_snapshot
+
+User = get_user_model()
+
+SELLER_NAME_FIELDS = {'first_name', 'last_name'}
+SELLER_PROFILE_FIELDS = {'average_rating', 'is_verified'}
+
+# Sent with ``product_ids`` after a queryset update moves available products
+# to 'expired'. Queryset updates skip post_save, so this stands in for it.
+products_expired = Signal()
+
+
+# Set while api.bulk deletes personal records; it writes their tombstones,
+# rollups and dashboard invalidations once per batch instead of per row.
+_bulk_delete = ContextVar('bulk_delete', default=False)
+
+
+@contextmanager
+def bulk_delete():
+    """Make the per-row delete receivers for personal records no-ops"""
+    token = _bulk_delete.set(True)
+    try:
+        yield
+    finally:
+        _bulk_delete.reset(token)
+
+
+@receiver(post_save, sender=FoodItem)
+@receiver(post_delete, sender=FoodItem)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Todo)
+@receiver(post_delete, sender=Todo)
+def invalidate_user_dashboard(sender, instance, **kwargs):
+    if _bulk_delete.get():
+        return
+    invalidate_dashboard(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_ingredient_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'ingredients' not in update_fields:
+        return
+    index_recipe(instance)
+
+
+# Sync tombstones
+
+TOMBSTONE_MODEL_NAMES = {FoodItem: 'food_item', Recipe: 'recipe', Todo: 'todo'}
+
+
+@receiver(post_delete, sender=FoodItem)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Todo)
+def record_deletion(sender, instance, origin=None, **kwargs):
+    # Rows removed along with their user need no tombstone (and it could not be saved)
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User or _bulk_delete.get():
+        return
+    DeletedRecord.objects.create(
+        user_id=instance.user_id,
+        model_name=TOMBSTONE_MODEL_NAMES[sender],
+        object_id=instance.pk
+    )
+
+
+@receiver(post_delete, sender=FoodItem)
+def record_food_item_removal(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User or _bulk_delete.get():
+        return
+    rollups.record_removed_food_items([
+        (instance.user_id, instance.expiry_date, instance.quantity_amount, instance.quantity_unit,
+         instance.waste_recorded)
+    ])
+
+
+@receiver(post_save, sender=WasteProduct)
+def update_coordinate_snapshot(sender, instance, **kwargs):
+    if coordinate_snapshot is not None and coordinate_snapshot.is_loaded:
+        coordinate_snapshot.upsert(instance)
+
+
+@receiver(post_delete, sender=WasteProduct)
+def remove_from_coordinate_snapshot(sender, instance, **kwargs):
+    if coordinate_snapshot is not None and coordinate_snapshot.is_loaded:
+        coordinate_snapshot.remove(instance.pk)
+
+
+@receiver(post_save, sender=WasteProduct)
+def update_search_index(sender, instance, **kwargs):
+    index_product(instance)
+
+
+@receiver(post_delete, sender=WasteProduct)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_product(instance.pk)
+
+
+@receiver(post_save, sender=WasteProduct)
+def update_autocomplete_product(sender, instance, **kwargs):
+    if autocomplete_index.is_loaded:
+        autocomplete_index.upsert_product(instance)
+
+
+@receiver(post_delete, sender=WasteProduct)
+def remove_autocomplete_product(sender, instance, **kwargs):
+    if autocomplete_index.is_loaded:
+        autocomplete_index.remove_product(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def update_autocomplete_category(sender, instance, **kwargs):
+    if autocomplete_index.is_loaded:
+        autocomplete_index.upsert_category(instance)
+
+
+@receiver(post_delete, sender=Category)
+def remove_autocomplete_category(sender, instance, **kwargs):
+    if autocomplete_index.is_loaded:
+        autocomplete_index.remove_category(instance.pk)
+
+
+@receiver(post_save, sender=Favorite)
+def add_autocomplete_favorite(sender, instance, created, **kwargs):
+    if created and autocomplete_index.is_loaded:
+        autocomplete_index.adjust_favorites(instance.product_id, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def remove_autocomplete_favorite(sender, instance, **kwargs):
+    if autocomplete_index.is_loaded:
+        autocomplete_index.adjust_favorites(instance.product_id, -1)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def update_primary_image(sender, instance, **kwargs):
+    refresh_primary_image(instance.product_id)
+    invalidate_listings()
+
+
+@receiver(post_save, sender=User)
+def update_seller_name(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not SELLER_NAME_FIELDS & set(update_fields)):
+        return
+    updated = WasteProduct.objects.filter(seller_id=instance.pk).exclude(
+        seller_name=instance.full_name
+    ).update(seller_name=instance.full_name)
+    if updated:
+        invalidate_listings()
+
+
+@receiver(post_save, sender=UserProfile)
+def update_seller_profile_snapshot(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SELLER_PROFILE_FIELDS & set(update_fields):
+        return
+    # Only a real change rewrites products and bumps the listings cache version
+    updated = WasteProduct.objects.filter(seller_id=instance.user_id).exclude(
+        seller_rating=instance.average_rating, seller_verified=instance.is_verified
+    ).update(
+        seller_rating=instance.average_rating,
+        seller_verified=instance.is_verified
+    )
+    if updated:
+        invalidate_listings()
+
+
+@receiver(post_delete, sender=UserProfile)
+def reset_seller_profile_snapshot(sender, instance, **kwargs):
+    updated = WasteProduct.objects.filter(seller_id=instance.user_id).exclude(
+        seller_rating=0.0, seller_verified=False
+    ).update(
+        seller_rating=0.0,
+        seller_verified=False
+    )
+    if updated:
+        invalidate_listings()
+
+
+@receiver(post_save, sender=WasteProduct)
+@receiver(post_delete, sender=WasteProduct)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_product_listings(sender, **kwargs):
+    invalidate_listings()
+
+
+# Marketplace counters
+
+@receiver(post_init, sender=WasteProduct)
+def remember_product_counter_state(sender, instance, **kwargs):
+    # Read through __dict__ so deferred fields are not loaded
+    instance._counter_state = (instance.__dict__.get('status'), instance.__dict__.get('category_id'))
+
+
+@receiver(post_save, sender=WasteProduct)
+def update_product_counters(sender, instance, created, **kwargs):
+    old_status, old_category_id = (None, None) if created else instance._counter_state
+    instance._counter_state = (instance.status, instance.category_id)
+    if not created and old_status is None:
+        return  # Previous state unknown; reconciliation will correct it
+
+    if created:
+        counters.adjust_counter(counters.PRODUCTS, 1)
+    if (old_status == 'available') != (instance.status == 'available'):
+        counters.adjust_counter(counters.AVAILABLE_PRODUCTS, 1 if instance.status == 'available' else -1)
+    if old_category_id != instance.category_id:
+        if old_category_id is not None:
+            counters.adjust_counter(counters.category_key(old_category_id), -1)
+        counters.adjust_counter(counters.category_key(instance.category_id), 1)
+    if not created and instance.status == 'expired' and old_status != 'expired':
+        rollups.record_expired_products([
+            (instance.seller_id, instance.category_id, 1, instance.estimated_weight)
+        ])
+
+
+@receiver(post_delete, sender=WasteProduct)
+def decrement_product_counters(sender, instance, **kwargs):
+    counters.adjust_counter(counters.PRODUCTS, -1)
+    if instance.status == 'available':
+        counters.adjust_counter(counters.AVAILABLE_PRODUCTS, -1)
+    counters.adjust_counter(counters.category_key(instance.category_id), -1)
+
+
+@receiver(post_delete, sender=Category)
+def drop_category_counter(sender, instance, **kwargs):
+    MarketplaceCounter.objects.filter(key=counters.category_key(instance.pk)).delete()
+
+
+@receiver(post_init, sender=Interest)
+def remember_interest_counter_state(sender, instance, **kwargs):
+    instance._counter_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Interest)
+def update_transaction_counter(sender, instance, created, **kwargs):
+    old_status = None if created else instance._counter_status
+    instance._counter_status = instance.status
+    if not created and old_status is None:
+        return
+
+    if (old_status == 'completed') != (instance.status == 'completed'):
+        sign = 1 if instance.status == 'completed' else -1
+        counters.adjust_counter(counters.COMPLETED_TRANSACTIONS, sign)
+        rollups.record_transaction(instance, sign)
+
+
+@receiver(post_delete, sender=Interest)
+def decrement_transaction_counter(sender, instance, **kwargs):
+    if instance.status == 'completed':
+        counters.adjust_counter(counters.COMPLETED_TRANSACTIONS, -1)
+
+
+@receiver(post_save, sender=User)
+def increment_user_counter(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust_counter(counters.USERS, 1)
+
+
+@receiver(post_delete, sender=User)
+def decrement_user_counter(sender, instance, **kwargs):
+    counters.adjust_counter(counters.USERS, -1)
+
+
+# Conversation summaries
+
+@receiver(post_save, sender=Interest)
+def create_conversation_summaries(sender, instance, created, **kwargs):
+    if created:
+        conversations.create_summaries([instance])
+
+
+@receiver(post_init, sender=Message)
+def remember_message_read_state(sender, instance, **kwargs):
+    instance._was_read = instance.__dict__.get('is_read')
+
+
+@receiver(post_save, sender=Message)
+def update_conversation_summaries(sender, instance, created, **kwargs):
+    was_read = None if created else instance._was_read
+    instance._was_read = instance.is_read
+    if created:
+        conversations.record_message(instance)
+    elif was_read is not None and was_read != instance.is_read:
+        conversations.adjust_unread(instance.interest_id, instance.sender_id, -1 if instance.is_read else 1)
+
+
+@receiver(post_delete, sender=Message)
+def refresh_conversation_summaries(sender, instance, origin=None, **kwargs):
+    # Nothing to refresh when the whole conversation is going away
+    if isinstance(origin, Message) or getattr(origin, 'model', None) is Message:
+        conversations.refresh_summaries(instance.interest_id)
+
+
+# Expiry sweeps
+
+@receiver(products_expired)
+def apply_expired_products(sender, product_ids, **kwargs):
+    counters.adjust_counter(counters.AVAILABLE_PRODUCTS, -len(product_ids))
+    rollups.record_expired_products(
+        WasteProduct.objects.filter(id__in=product_ids).order_by().values(
+            'seller_id', 'category_id'
+        ).annotate(count=Count('id'), weight=Sum('estimated_weight')).values_list(
+            'seller_id', 'category_id', 'count', 'weight'
+        )
+    )
+    invalidate_listings()
+    for product_id in product_ids:
+        if coordinate_snapshot is not None and coordinate_snapshot.is_loaded:
+            coordinate_snapshot.remove(product_id)
+        if autocomplete_index.is_loaded:
+            autocomplete_index.remove_product(product_id)
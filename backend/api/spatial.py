@@ -0,0 +1,182 @@
+"""
+In-memory coordinate snapshot for distance queries over available products.
+
+The snapshot keeps (id, lat, lng, status, seller_id) for every available
+WasteProduct with coordinates in compact NumPy arrays, so a radius search is a
+single vectorized Haversine call instead of a Python loop over model
+instances. Writes in this process update the snapshot from model signals;
+writes made by other worker processes are picked up when the snapshot ages
+out and is reloaded (see ``NEARBY_SNAPSHOT_MAX_AGE``).
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .geo import EARTH_RADIUS_KM, KM_PER_DEGREE
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is listed in requirements.txt
+    np = None
+
+
+def haversine_km_many(latitude, longitude, lat_rad, lng_rad, cos_lat):
+    """
+    Great-circle distances in kilometres from one point to many points.
+    ``lat_rad``/``lng_rad`` are in radians and ``cos_lat`` is cos(lat_rad),
+    all precomputed by the caller.
+    """
+    phi = np.radians(latitude)
+    d_phi = lat_rad - phi
+    d_lambda = lng_rad - np.radians(longitude)
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi) * cos_lat * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class CoordinateSnapshot:
+    """Compact, incrementally maintained coordinate arrays for products"""
+
+    STATUS_CODES = {'available': 0, 'reserved': 1, 'sold': 2, 'expired': 3}
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._allocate(self.INITIAL_CAPACITY)
+
+    def _allocate(self, capacity):
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._seller_ids = np.zeros(capacity, dtype=np.int64)
+        self._status = np.zeros(capacity, dtype=np.int8)
+        self._lat_rad = np.zeros(capacity, dtype=np.float64)
+        self._lng_rad = np.zeros(capacity, dtype=np.float64)
+        self._cos_lat = np.zeros(capacity, dtype=np.float64)
+        self._rows = {}
+        self._size = 0
+
+    def _grow(self):
+        capacity = max(self.INITIAL_CAPACITY, len(self._ids) * 2)
+        for name in ('_ids', '_seller_ids', '_status', '_lat_rad', '_lng_rad', '_cos_lat'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def is_loaded(self):
+        return self._loaded_at is not None
+
+    def is_stale(self):
+        if self._loaded_at is None:
+            return True
+        return self.max_age is not None and time.monotonic() - self._loaded_at > self.max_age
+
+    def load_rows(self, ids, latitudes, longitudes, statuses, seller_ids):
+        """Replace the snapshot contents with the given column arrays"""
+        ids = np.asarray(ids, dtype=np.int64)
+        lat_rad = np.radians(np.asarray(latitudes, dtype=np.float64))
+        with self._lock:
+            self._allocate(max(self.INITIAL_CAPACITY, len(ids)))
+            size = len(ids)
+            self._ids[:size] = ids
+            self._seller_ids[:size] = seller_ids
+            self._status[:size] = [self.STATUS_CODES[s] for s in statuses]
+            self._lat_rad[:size] = lat_rad
+            self._lng_rad[:size] = np.radians(np.asarray(longitudes, dtype=np.float64))
+            self._cos_lat[:size] = np.cos(lat_rad)
+            self._rows = {int(pk): row for row, pk in enumerate(ids)}
+            self._size = size
+            self._loaded_at = time.monotonic()
+
+    def load(self):
+        """Reload the snapshot from the database"""
+        from .models import WasteProduct
+
+        rows = list(WasteProduct.objects.filter(
+            status='available',
+            latitude__isnull=False,
+            longitude__isnull=False
+        ).values_list('id', 'latitude', 'longitude', 'status', 'seller_id'))
+        columns = list(zip(*rows)) if rows else [(), (), (), (), ()]
+        self.load_rows(*columns)
+
+    def ensure_loaded(self):
+        if self.is_stale():
+            self.load()
+
+    def upsert(self, product):
+        """Add, move or drop a product after it has been saved"""
+        if (product.status != 'available' or
+                product.latitude is None or product.longitude is None):
+            self.remove(product.pk)
+            return
+
+        lat_rad = np.radians(product.latitude)
+        with self._lock:
+            row = self._rows.get(product.pk)
+            if row is None:
+                if self._size == len(self._ids):
+                    self._grow()
+                row = self._size
+                self._size += 1
+                self._rows[product.pk] = row
+            self._ids[row] = product.pk
+            self._seller_ids[row] = product.seller_id
+            self._status[row] = self.STATUS_CODES[product.status]
+            self._lat_rad[row] = lat_rad
+            self._lng_rad[row] = np.radians(product.longitude)
+            self._cos_lat[row] = np.cos(lat_rad)
+
+    def remove(self, product_id):
+        """Drop a product, moving the last row into its slot"""
+        with self._lock:
+            row = self._rows.pop(product_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                for name in ('_ids', '_seller_ids', '_status', '_lat_rad', '_lng_rad', '_cos_lat'):
+                    column = getattr(self, name)
+                    column[row] = column[last]
+                self._rows[int(self._ids[row])] = row
+            self._size = last
+
+    def query(self, latitude, longitude, radius_km, exclude_seller_id=None):
+        """
+        Return (ids, distances_km) of available products within ``radius_km``,
+        ordered by distance.
+        """
+        with self._lock:
+            size = self._size
+            ids = self._ids[:size]
+            lat_rad = self._lat_rad[:size]
+
+            # Cheap latitude band check before any trigonometry
+            band = np.radians(radius_km / KM_PER_DEGREE)
+            mask = np.abs(lat_rad - np.radians(latitude)) <= band
+            mask &= self._status[:size] == self.STATUS_CODES['available']
+            if exclude_seller_id is not None:
+                mask &= self._seller_ids[:size] != exclude_seller_id
+            candidates = np.flatnonzero(mask)
+
+            distances = haversine_km_many(
+                latitude, longitude,
+                lat_rad[candidates], self._lng_rad[candidates], self._cos_lat[candidates]
+            )
+            ids = ids[candidates]
+
+        within = distances <= radius_km
+        ids = ids[within]
+        distances = distances[within]
+        order = np.argsort(distances, kind='stable')
+        return ids[order], distances[order]
+
+
+coordinate_snapshot = CoordinateSnapshot(
+    max_age=getattr(settings, 'NEARBY_SNAPSHOT_MAX_AGE', 300)
+) if np is not None else None
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from api.expiry import record_expired_food_items
+from api.models import DailyUserRollup, FoodItem
+
+User = get_user_model()
+
+
+class RecordExpiredFoodItemsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='pantry@example.com', username='pantry', password='secret',
+            first_name='Pan', last_name='Try'
+        )
+        self.today = date.today()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def rollup(self, day):
+        return DailyUserRollup.objects.filter(user=self.user, date=day).values(
+            'food_wasted', 'food_wasted_kg', 'food_consumed'
+        ).first()
+
+    def test_expired_items_are_counted_once_on_their_expiry_date(self):
+        expired = FoodItem.objects.create(
+            user=self.user, name='Milk', quantity='500 g', expiry_date=self.yesterday
+        )
+        FoodItem.objects.create(user=self.user, name='Rice', quantity='1 kg', expiry_date=self.today)
+
+        self.assertEqual(record_expired_food_items(), 1)
+        self.assertEqual(record_expired_food_items(), 0)
+        self.assertEqual(self.rollup(self.yesterday), {'food_wasted': 1, 'food_wasted_kg': 0.5, 'food_consumed': 0})
+
+        expired.refresh_from_db()
+        self.assertTrue(expired.waste_recorded)
+        expired.delete()
+        self.assertEqual(self.rollup(self.yesterday)['food_wasted'], 1)
+        self.assertIsNone(self.rollup(self.today))
+
+    def test_items_deleted_before_the_sweep_are_still_counted_on_delete(self):
+        FoodItem.objects.create(user=self.user, name='Bread', quantity='1 loaf', expiry_date=self.yesterday).delete()
+
+        self.assertEqual(record_expired_food_items(), 0)
+        self.assertEqual(self.rollup(self.yesterday)['food_wasted'], 1)
@@ -0,0 +1,91 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import FoodItem, Todo
+
+User = get_user_model()
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='importer@example.com', username='importer', password='secret',
+            first_name='Im', last_name='Porter'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, url, body, content_type):
+        return self.client.post(url, data=body, content_type=content_type)
+
+    def test_ndjson_rows_are_created_and_bad_rows_reported(self):
+        body = '\n'.join([
+            json.dumps({'name': 'Milk', 'quantity': '1 l', 'expiry_date': '2030-01-01'}),
+            '',
+            'not json',
+            json.dumps(['a list']),
+            json.dumps({'name': 'Eggs', 'quantity': '12'}),
+            json.dumps({'name': 'Rice', 'quantity': '2 kg', 'expiry_date': '2030-02-01'}),
+        ]).encode()
+
+        response = self.post('/api/food-items/import/', body, 'application/x-ndjson')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 3)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4])
+        rice = FoodItem.objects.get(user=self.user, name='Rice')
+        self.assertEqual((rice.quantity_amount, rice.quantity_unit), (2000.0, 'g'))
+
+    def test_csv_rows_are_created(self):
+        body = (
+            '\ufefftitle,priority,is_completed\n'
+            'Buy flour,high,false\n'
+            '"Compost, then water",low,true\n'
+            ',medium,false\n'
+        ).encode('utf-8')
+
+        response = self.post('/api/todos/import/', body, 'text/csv')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+        done = Todo.objects.get(user=self.user, title='Compost, then water')
+        self.assertTrue(done.is_completed)
+        self.assertIsNotNone(done.completed_at)
+
+    def test_non_utf8_lines_are_reported_as_row_errors(self):
+        body = (
+            'title,priority\n'.encode()
+            + 'Café run,high\n'.encode('latin-1')
+            + 'Sweep,low\n'.encode()
+        )
+
+        response = self.post('/api/todos/import/', body, 'text/csv')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], [
+            {'row': 1, 'errors': {'non_field_errors': ['Row is not valid UTF-8 text']}}
+        ])
+        self.assertEqual(list(Todo.objects.values_list('title', flat=True)), ['Sweep'])
+
+    def test_non_utf8_ndjson_line_is_reported(self):
+        body = (
+            '{"title": "Caf\xe9"}\n'.encode('latin-1')
+            + json.dumps({'title': 'Mop'}).encode()
+        )
+
+        response = self.post('/api/todos/import/', body, 'application/x-ndjson')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertEqual(response.data['errors'][0]['row'], 1)
+
+    def test_unsupported_content_type(self):
+        response = self.post('/api/todos/import/', b'<todos/>', 'application/xml')
+        self.assertEqual(response.status_code, 415)
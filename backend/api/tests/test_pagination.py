@@ -0,0 +1,83 @@
+from base64 import b64encode
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import FoodItem, Todo
+
+User = get_user_model()
+
+
+class StableCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='pager@example.com', username='pager', password='secret',
+            first_name='Pa', last_name='Ger'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for number in range(23):
+            Todo.objects.create(
+                user=self.user, title=f'todo {number:02}', priority=['low', 'medium', 'high'][number % 3]
+            )
+
+    def walk(self, url, link='next'):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data[link]
+        return ids
+
+    def test_pages_through_tie_groups_in_order(self):
+        for ordering in ['priority', '-priority', 'title', '-created_at']:
+            with self.subTest(ordering=ordering):
+                ids = self.walk(f'/api/todos/?ordering={ordering}&page_size=4')
+                expected = list(Todo.objects.order_by(
+                    ordering, '-id' if ordering.startswith('-') else 'id'
+                ).values_list('id', flat=True))
+                self.assertEqual(ids, expected)
+
+    def test_previous_links_walk_back_over_the_same_rows(self):
+        url = '/api/todos/?ordering=priority&page_size=4'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            pages.append([row['id'] for row in response.data['results']])
+            last = response
+            url = response.data['next']
+        url = last.data['previous']
+        for page in reversed(pages[:-1]):
+            response = self.client.get(url)
+            self.assertEqual([row['id'] for row in response.data['results']], page)
+            url = response.data['previous']
+        self.assertIsNone(url)
+
+    def test_rows_inserted_into_a_served_tie_group_do_not_shift_the_cursor(self):
+        first = self.client.get('/api/todos/?ordering=priority&page_size=5')
+        served = [row['id'] for row in first.data['results']]
+        # Sorts inside the 'high' group the first page stopped in
+        Todo.objects.create(user=self.user, title='late', priority='high')
+        rest = self.walk(first.data['next'])
+        self.assertFalse(set(served) & set(rest))
+        self.assertEqual(len(served) + len(rest), Todo.objects.count())
+
+    def test_food_items_page_over_shared_expiry_dates(self):
+        for number in range(12):
+            FoodItem.objects.create(
+                user=self.user, name=f'item {number:02}', quantity='1',
+                expiry_date=date(2030, 1, 1) + timedelta(days=number % 2)
+            )
+        ids = self.walk('/api/food-items/?ordering=expiry_date&page_size=5')
+        self.assertEqual(ids, list(FoodItem.objects.order_by('expiry_date', 'id').values_list('id', flat=True)))
+
+    def test_invalid_cursor_positions(self):
+        for position in ['not json', '[1]', '{"id": 1}']:
+            with self.subTest(position=position):
+                cursor = b64encode(urlencode({'p': position}).encode()).decode()
+                response = self.client.get(f'/api/todos/?cursor={cursor}')
+                self.assertEqual(response.status_code, 404)
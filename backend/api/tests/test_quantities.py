@@ -0,0 +1,48 @@
+from django.test import SimpleTestCase
+
+from api.quantities import parse_quantities, parse_quantity
+
+CASES = [
+    ('500g', (500.0, 'g')),
+    ('1 kg', (1000.0, 'g')),
+    ('1.5kg', (1500.0, 'g')),
+    ('1,5 kg', (1500.0, 'g')),
+    ('12,345.6 g', (12345.6, 'g')),
+    ('1,000,000 g', (1000000.0, 'g')),
+    ('1,000', (1000.0, 'pcs')),
+    ('1½ cups', (360.0, 'ml')),
+    ('1 1/2 cups', (360.0, 'ml')),
+    ('3/4 l', (750.0, 'ml')),
+    ('2 x 400g', (800.0, 'g')),
+    ('1-2 kg', (1000.0, 'g')),
+    ('1 kg.', (1000.0, 'g')),
+    ('3', (3.0, 'pcs')),
+    ('2 bananas', (2.0, 'pcs')),
+    ('2 bunches', (2.0, 'bunch')),
+    ('2 boxes', (2.0, 'box')),
+    (' 2 tins ', (2.0, 'tin')),
+    ('2 loaves', (2.0, 'loaf')),
+    ('1 dozen', (12.0, 'pcs')),
+    ('1.5.2', (None, '')),
+    ('1e5 g', (None, '')),
+    ('2 large onions', (None, '')),
+    ('some', (None, '')),
+    ('1/0 kg', (None, '')),
+    ('', (None, '')),
+    (None, (None, '')),
+]
+
+
+class ParseQuantityTests(SimpleTestCase):
+    def test_cases(self):
+        for text, expected in CASES:
+            with self.subTest(text=text):
+                self.assertEqual(parse_quantity(text), expected)
+
+    def test_default_unit_applies_to_bare_numbers(self):
+        self.assertEqual(parse_quantity('2', 'kg'), (2000.0, 'g'))
+        self.assertEqual(parse_quantity('2 l', 'kg'), (2000.0, 'ml'))
+
+    def test_parse_quantities_matches_parse_quantity(self):
+        texts = [text for text, _ in CASES if text]
+        self.assertEqual(parse_quantities(texts), [parse_quantity(text.strip().lower()) for text in texts])
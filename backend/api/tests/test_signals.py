@@ -0,0 +1,36 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from api.models import Category, UserProfile, WasteProduct
+
+User = get_user_model()
+
+
+class SellerProfileSnapshotTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email='seller@example.com', username='seller', password='secret',
+            first_name='Sel', last_name='Ler'
+        )
+        self.profile = UserProfile.objects.create(user=self.seller)
+        category = Category.objects.create(name='Produce')
+        WasteProduct.objects.create(
+            seller=self.seller, title='Kale', description='Fresh', category=category,
+            price=1, quantity='1', location='Nairobi'
+        )
+
+    def save_profile(self):
+        with mock.patch('api.signals.invalidate_listings') as invalidate:
+            self.profile.save()
+        return invalidate.called
+
+    def test_unrelated_profile_edit_keeps_listing_cache(self):
+        self.profile.phone = '0700000000'
+        self.assertFalse(self.save_profile())
+
+    def test_rating_change_updates_products_and_listing_cache(self):
+        self.profile.average_rating = 4.5
+        self.assertTrue(self.save_profile())
+        self.assertEqual(WasteProduct.objects.get().seller_rating, 4.5)
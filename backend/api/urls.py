@@ -5,6 +5,9 @@ from .views import (
     FoodItemDetailView,
     RecipeListCreateView,
     RecipeDetailView,
+    recipe_suggestions,
+    bulk_import,
+    bulk_action,
     TodoListCreateView,
     TodoDetailView,
     TodoToggleView,
@@ -12,6 +15,8 @@ from .views import (
     food_items_expiring,
     todos_due_today,
     user_data_summary,
+    user_data_sync,
+    sustainability_analytics,
     # Marketplace ViewSets
     CategoryViewSet,
     WasteProductViewSet,
@@ -47,20 +52,28 @@ urlpatterns = [
     path('food-items/', FoodItemListCreateView.as_view(), name='food_item_list_create'),
     path('food-items/<int:pk>/', FoodItemDetailView.as_view(), name='food_item_detail'),
     path('food-items/expiring/', food_items_expiring, name='food_items_expiring'),
+    path('food-items/import/', bulk_import, {'resource': 'food-items'}, name='food_item_import'),
+    path('food-items/bulk/', bulk_action, {'resource': 'food-items'}, name='food_item_bulk'),
     
     # Recipes
     path('recipes/', RecipeListCreateView.as_view(), name='recipe_list_create'),
     path('recipes/<int:pk>/', RecipeDetailView.as_view(), name='recipe_detail'),
+    path('recipes/suggestions/', recipe_suggestions, name='recipe_suggestions'),
+    path('recipes/import/', bulk_import, {'resource': 'recipes'}, name='recipe_import'),
     
     # Todos
     path('todos/', TodoListCreateView.as_view(), name='todo_list_create'),
     path('todos/<int:pk>/', TodoDetailView.as_view(), name='todo_detail'),
     path('todos/<int:pk>/toggle/', TodoToggleView.as_view(), name='todo_toggle'),
     path('todos/due-today/', todos_due_today, name='todos_due_today'),
+    path('todos/import/', bulk_import, {'resource': 'todos'}, name='todo_import'),
+    path('todos/bulk/', bulk_action, {'resource': 'todos'}, name='todo_bulk'),
     
     # Dashboard and Summary
     path('dashboard/', dashboard_summary, name='dashboard_summary'),
     path('user-data/', user_data_summary, name='user_data_summary'),
+    path('user-data/sync/', user_data_sync, name='user_data_sync'),
+    path('analytics/', sustainability_analytics, name='sustainability_analytics'),
     
     # Marketplace summary endpoints
     path('marketplace/summary/', marketplace_summary, name='marketplace_summary'),
@@ -3,36 +3,69 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Q, Avg, Count
+from django.db.models import Q, F, Avg, Count, Sum, Case, When, Value, IntegerField
+from django.db.models.functions import TruncMonth
 from datetime import date, timedelta
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from .models import (
-    FoodItem, Recipe, Todo, WasteProduct, Category, ProductImage, 
-    Interest, Message, Review, UserProfile, Favorite, Report
+    FoodItem, Recipe, RecipeIngredient, Todo, DeletedRecord, DailyUserRollup, DailyCategoryRollup,
+    WasteProduct, Category, ProductImage, 
+    Interest, Message, ConversationSummary, Review, UserProfile, Favorite, Report
 )
 from .serializers import (
     FoodItemSerializer,
     RecipeSerializer,
     TodoSerializer,
     TodoToggleSerializer,
+    BulkActionSerializer,
+    TodoBulkActionSerializer,
     FoodItemSummarySerializer,
     RecipeSummarySerializer,
     TodoSummarySerializer,
     WasteProductSerializer,
     WasteProductListSerializer,
+    NearbyWasteProductSerializer,
     CategorySerializer,
     ProductImageSerializer,
     InterestSerializer,
     MessageSerializer,
+    ConversationSummarySerializer,
     ReviewSerializer,
     UserProfileSerializer,
     FavoriteSerializer,
     ReportSerializer
 )
 from .filters import FoodItemFilter, WasteProductFilter
+from .autocomplete import autocomplete_index, TITLE, CATEGORY, LOCATION
+from .cache import DASHBOARD_CACHE_TIMEOUT, cached_listing_response, dashboard_cache_key
+from .counters import (
+    PRODUCTS, AVAILABLE_PRODUCTS, USERS, COMPLETED_TRANSACTIONS,
+    category_key, read_counters
+)
+from .pagination import RankedListPagination, StableCursorPagination
+from .rollups import CATEGORY_ROLLUP_FIELDS, USER_ROLLUP_FIELDS
+from .search import FullTextSearchFilter
+from .bulk import complete_todos, uncomplete_todos, set_todo_priority, delete_records
+from .imports import IMPORTERS, UnsupportedImportFormat, import_rows, read_rows
+from .ingredients import ingredient_terms
+from .geo import GEOHASH_UPPER_BOUND, covering_cells, haversine_km
+from .spatial import coordinate_snapshot
+from .sync import InvalidSyncToken, issue_sync_token, read_sync_token, sync_window_start
 
 User = get_user_model()
 
+# (min, max) price ranges for the facets endpoint; the last range is open-ended
+PRICE_BUCKETS = [(0, 100), (100, 500), (500, 1000), (1000, 5000), (5000, None)]
+
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+RECIPE_SUGGESTIONS_MAX_LIMIT = 50
+
+MESSAGE_HISTORY_PAGE_SIZE = 50
+MESSAGE_HISTORY_MAX_PAGE_SIZE = 100
+
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """
@@ -76,7 +109,7 @@ class FoodItemListCreateView(generics.ListCreateAPIView):
     filterset_class = FoodItemFilter
     search_fields = ['name']
     ordering_fields = ['name', 'expiry_date', 'created_at']
-    ordering = ['expiry_date']
+    ordering = ['expiry_date', 'name', 'id']
     
     def get_queryset(self):
         return FoodItem.objects.filter(user=self.request.user)
@@ -98,7 +131,7 @@ class RecipeListCreateView(generics.ListCreateAPIView):
     filterset_fields = ['difficulty', 'is_custom', 'is_saved']
     search_fields = ['name', 'description', 'ingredients']
     ordering_fields = ['name', 'difficulty', 'total_time', 'created_at']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         return Recipe.objects.filter(user=self.request.user)
@@ -112,6 +145,81 @@ class RecipeDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Recipe.objects.filter(user=self.request.user)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_import(request, resource):
+    """
+    Import food items, recipes or todos from an NDJSON or CSV request body.
+    Valid rows are created; invalid rows are reported by row number.
+    """
+    if resource not in IMPORTERS:
+        return Response({'error': 'Unknown import resource'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        rows = read_rows(request)
+    except UnsupportedImportFormat as e:
+        return Response({'error': str(e)}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    
+    report = import_rows(request, resource, rows)
+    response_status = status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST
+    if not report['created'] and not report['failed']:
+        response_status = status.HTTP_200_OK
+    return Response(report, status=response_status)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def recipe_suggestions(request):
+    """
+    Rank the user's recipes by how many distinct food items expiring within
+    ``?days=`` (default 3) they use, most urgent first on ties.
+    """
+    user = request.user
+    try:
+        days = int(request.query_params.get('days', 3))
+        limit = min(int(request.query_params.get('limit', 20)), RECIPE_SUGGESTIONS_MAX_LIMIT)
+    except ValueError:
+        return Response({'error': 'days and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    expiring_items = list(FoodItem.objects.filter(
+        user=user,
+        expiry_date__gte=date.today(),
+        expiry_date__lte=date.today() + timedelta(days=days)
+    ).values_list('id', 'name', 'expiry_date'))
+    
+    # term -> ids of the expiring items it stands for
+    items_by_term = {}
+    for item_id, name, _ in expiring_items:
+        for term in ingredient_terms(name):
+            items_by_term.setdefault(term, set()).add(item_id)
+    
+    # Sparse intersection: only index rows for the pantry's terms are read
+    matches = {}
+    for recipe_id, term in RecipeIngredient.objects.filter(
+        user=user, ingredient__name__in=items_by_term
+    ).values_list('recipe_id', 'ingredient__name'):
+        matches.setdefault(recipe_id, set()).update(items_by_term[term])
+    
+    expiry_by_item = {item_id: expiry_date for item_id, _, expiry_date in expiring_items}
+    ranked = sorted(
+        matches.items(),
+        key=lambda match: (-len(match[1]), min(expiry_by_item[i] for i in match[1]), match[0])
+    )[:max(limit, 0)]
+    
+    recipes = Recipe.objects.in_bulk([recipe_id for recipe_id, _ in ranked])
+    items = {item_id: (name, expiry_date) for item_id, name, expiry_date in expiring_items}
+    return Response([
+        {
+            'recipe': RecipeSummarySerializer(recipes[recipe_id]).data,
+            'matched_count': len(item_ids),
+            'matched_food_items': [
+                {'id': item_id, 'name': items[item_id][0], 'expiry_date': items[item_id][1]}
+                for item_id in sorted(item_ids, key=lambda i: (items[i][1], i))
+            ],
+        }
+        for recipe_id, item_ids in ranked
+    ])
+
+
 # Todo Views
 class TodoListCreateView(generics.ListCreateAPIView):
     serializer_class = TodoSerializer
@@ -119,8 +227,9 @@ class TodoListCreateView(generics.ListCreateAPIView):
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['is_completed', 'priority']
     search_fields = ['title', 'description']
-    ordering_fields = ['title', 'priority', 'due_date', 'created_at']
-    ordering = ['-created_at']
+    # due_date is nullable, which cursor pagination cannot page over
+    ordering_fields = ['title', 'priority', 'created_at']
+    ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         return Todo.objects.filter(user=self.request.user)
@@ -148,57 +257,104 @@ class TodoToggleView(generics.UpdateAPIView):
         return Response(serializer.data)
 
 
+BULK_ACTIONS = {
+    'food-items': (FoodItem, FoodItemSerializer, BulkActionSerializer),
+    'todos': (Todo, TodoSerializer, TodoBulkActionSerializer),
+}
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_action(request, resource):
+    """
+    Apply one action to a list of the user's food items or todos with a single
+    UPDATE or DELETE. Updates return the affected rows; ids that do not exist
+    or belong to someone else are ignored.
+    """
+    model, serializer_class, action_serializer_class = BULK_ACTIONS[resource]
+    action_serializer = action_serializer_class(data=request.data)
+    action_serializer.is_valid(raise_exception=True)
+    data = action_serializer.validated_data
+    queryset = model.objects.filter(user=request.user, id__in=data['ids'])
+    
+    if data['action'] == 'delete':
+        deleted_ids = delete_records(queryset)
+        return Response({'deleted': len(deleted_ids), 'deleted_ids': deleted_ids})
+    
+    if data['action'] == 'complete':
+        updated = complete_todos(queryset)
+    elif data['action'] == 'uncomplete':
+        updated = uncomplete_todos(queryset)
+    else:
+        updated = set_todo_priority(queryset, data['priority'])
+    return Response({
+        'updated': updated,
+        'results': serializer_class(queryset.order_by('id'), many=True).data,
+    })
+
+
 # Dashboard/Summary Views
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def dashboard_summary(request):
-    """Get summary data for dashboard"""
-    user = request.user
+    """Get summary data for dashboard, cached per user until their data changes"""
+    key = dashboard_cache_key(request.user.id)
+    data = cache.get(key)
+    if data is None:
+        data = _dashboard_data(request.user)
+        cache.set(key, data, DASHBOARD_CACHE_TIMEOUT)
+    return Response(data)
+
+
+def _dashboard_data(user):
+    """One conditional aggregate per model plus the short preview lists"""
+    today = date.today()
+    soon = today + timedelta(days=3)
     
     # Food items summary
     food_items = FoodItem.objects.filter(user=user)
-    expired_items = food_items.filter(expiry_date__lt=date.today())
-    expiring_soon = food_items.filter(
-        expiry_date__gte=date.today(),
-        expiry_date__lte=date.today() + timedelta(days=3)
+    expired_filter = Q(expiry_date__lt=today)
+    expiring_soon_filter = Q(expiry_date__gte=today, expiry_date__lte=soon)
+    food_counts = food_items.aggregate(
+        total=Count('id'),
+        expired=Count('id', filter=expired_filter),
+        expiring_soon=Count('id', filter=expiring_soon_filter),
     )
     
     # Recipes summary
     recipes = Recipe.objects.filter(user=user)
-    custom_recipes = recipes.filter(is_custom=True)
-    saved_recipes = recipes.filter(is_saved=True)
+    recipe_counts = recipes.aggregate(
+        total=Count('id'),
+        custom=Count('id', filter=Q(is_custom=True)),
+        saved=Count('id', filter=Q(is_saved=True)),
+    )
     
     # Todos summary
     todos = Todo.objects.filter(user=user)
-    completed_todos = todos.filter(is_completed=True)
-    pending_todos = todos.filter(is_completed=False)
-    overdue_todos = todos.filter(
-        is_completed=False,
-        due_date__lt=date.today()
+    todo_counts = todos.aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(is_completed=True)),
+        pending=Count('id', filter=Q(is_completed=False)),
+        overdue=Count('id', filter=Q(is_completed=False, due_date__lt=timezone.now())),
     )
     
-    return Response({
+    return {
         'food_items': {
-            'total': food_items.count(),
-            'expired': expired_items.count(),
-            'expiring_soon': expiring_soon.count(),
-            'expired_items': FoodItemSummarySerializer(expired_items[:5], many=True).data,
-            'expiring_soon_items': FoodItemSummarySerializer(expiring_soon[:5], many=True).data,
+            **food_counts,
+            'expired_items': FoodItemSummarySerializer(food_items.filter(expired_filter)[:5], many=True).data,
+            'expiring_soon_items': FoodItemSummarySerializer(
+                food_items.filter(expiring_soon_filter)[:5], many=True
+            ).data,
         },
         'recipes': {
-            'total': recipes.count(),
-            'custom': custom_recipes.count(),
-            'saved': saved_recipes.count(),
+            **recipe_counts,
             'recent': RecipeSummarySerializer(recipes[:5], many=True).data,
         },
         'todos': {
-            'total': todos.count(),
-            'completed': completed_todos.count(),
-            'pending': pending_todos.count(),
-            'overdue': overdue_todos.count(),
-            'recent_pending': TodoSummarySerializer(pending_todos[:5], many=True).data,
+            **todo_counts,
+            'recent_pending': TodoSummarySerializer(todos.filter(is_completed=False)[:5], many=True).data,
         }
-    })
+    }
 
 
 @api_view(['GET'])
@@ -251,6 +407,111 @@ def user_data_summary(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def user_data_sync(request):
+    """
+    Get user data changed since ``?token=`` (a previous response's
+    ``sync_token``). Without a token, or with one too old to answer from
+    tombstones, everything is returned with ``full: true``.
+    """
+    user = request.user
+    issued_at = timezone.now()
+    since = None
+    
+    token = request.query_params.get('token')
+    if token:
+        try:
+            since = sync_window_start(read_sync_token(token, user))
+        except InvalidSyncToken as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    food_items = FoodItem.objects.filter(user=user)
+    recipes = Recipe.objects.filter(user=user)
+    todos = Todo.objects.filter(user=user)
+    deleted = {'food_items': [], 'recipes': [], 'todos': []}
+    
+    if since is not None:
+        food_items = food_items.filter(updated_at__gte=since)
+        recipes = recipes.filter(updated_at__gte=since)
+        todos = todos.filter(updated_at__gte=since)
+        tombstones = DeletedRecord.objects.filter(user=user, deleted_at__gte=since)
+        for model_name, object_id in tombstones.values_list('model_name', 'object_id'):
+            deleted[f'{model_name}s'].append(object_id)
+    
+    return Response({
+        'full': since is None,
+        'food_items': FoodItemSerializer(food_items, many=True).data,
+        'recipes': RecipeSerializer(recipes, many=True).data,
+        'todos': TodoSerializer(todos, many=True).data,
+        'deleted': deleted,
+        'sync_token': issue_sync_token(user, issued_at),
+    })
+
+
+# period -> number of buckets (days, or months for a year)
+ANALYTICS_PERIODS = {'week': 7, 'month': 30, 'year': 12}
+
+
+def _analytics_buckets(period, today):
+    """Bucket start dates, oldest first, and the expression that groups rollup rows into them"""
+    if period != 'year':
+        days = ANALYTICS_PERIODS[period]
+        return [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)], F('date')
+    months = []
+    year, month = today.year, today.month
+    for _ in range(ANALYTICS_PERIODS[period]):
+        months.append(date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months[::-1], TruncMonth('date')
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def sustainability_analytics(request):
+    """
+    Food consumed and wasted, waste sold, bought and expired, and carbon saved
+    over ``?period=`` week or month (daily points) or year (monthly points),
+    read from the daily rollups.
+    """
+    period = request.query_params.get('period', 'week')
+    if period not in ANALYTICS_PERIODS:
+        return Response(
+            {'error': f"period must be one of: {', '.join(ANALYTICS_PERIODS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    today = date.today()
+    buckets, bucket = _analytics_buckets(period, today)
+    
+    rows = DailyUserRollup.objects.filter(
+        user=request.user, date__gte=buckets[0], date__lte=today
+    ).order_by().values(bucket=bucket).annotate(**{field: Sum(field) for field in USER_ROLLUP_FIELDS})
+    by_bucket = {row.pop('bucket'): row for row in rows}
+    
+    empty = dict.fromkeys(USER_ROLLUP_FIELDS, 0)
+    series = [{'date': start, **by_bucket.get(start, empty)} for start in buckets]
+    totals = {field: sum(point[field] for point in series) for field in USER_ROLLUP_FIELDS}
+    
+    categories = DailyCategoryRollup.objects.filter(
+        user=request.user, date__gte=buckets[0], date__lte=today
+    ).order_by().values('category_id', 'category__name').annotate(
+        **{field: Sum(field) for field in CATEGORY_ROLLUP_FIELDS}
+    ).order_by('-waste_sold_kg', '-waste_bought_kg', 'category_id')
+    
+    return Response({
+        'period': period,
+        'interval': 'month' if period == 'year' else 'day',
+        'start': buckets[0],
+        'end': today,
+        'totals': totals,
+        'series': series,
+        'categories': [
+            {'category_id': row.pop('category_id'), 'category': row.pop('category__name'), **row}
+            for row in categories
+        ],
+    })
+
+
 # Marketplace ViewSets
 
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -271,18 +532,22 @@ class WasteProductViewSet(viewsets.ModelViewSet):
     """
     serializer_class = WasteProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsSellerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # Full-text search runs last so relevance ordering can replace the default ordering
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_class = WasteProductFilter
     search_fields = ['title', 'description', 'location']
     ordering_fields = ['created_at', 'price', 'title', 'available_from']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
     
     def get_queryset(self):
-        queryset = WasteProduct.objects.select_related('seller', 'category').prefetch_related('images')
+        queryset = WasteProduct.objects.select_related('category')
         
         # Filter by status if not owner
-        if self.action == 'list':
+        if self.action in ('list', 'facets'):
             queryset = queryset.filter(status='available')
+        else:
+            # Listings render the denormalized seller and primary image instead
+            queryset = queryset.select_related('seller').prefetch_related('images')
         
         return queryset
     
@@ -291,6 +556,12 @@ class WasteProductViewSet(viewsets.ModelViewSet):
             return WasteProductListSerializer
         return WasteProductSerializer
     
+    def list(self, request, *args, **kwargs):
+        """List products, served from the versioned listing cache"""
+        return cached_listing_response(
+            request, 'list', lambda: super(WasteProductViewSet, self).list(request, *args, **kwargs)
+        )
+    
     @action(detail=True, methods=['post'])
     def toggle_favorite(self, request, pk=None):
         """Toggle favorite status for a product"""
@@ -367,6 +638,84 @@ class WasteProductViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(product)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Get facet counts for the current filters and search"""
+        return cached_listing_response(
+            request, 'facets', lambda: Response(self._facet_counts(self.filter_queryset(self.get_queryset())))
+        )
+    
+    def _facet_counts(self, queryset):
+        """Fold every facet count out of a single grouped aggregate query"""
+        price_bucket = Case(
+            *[
+                When(price__lt=upper, then=Value(index))
+                for index, (_, upper) in enumerate(PRICE_BUCKETS[:-1])
+            ],
+            default=Value(len(PRICE_BUCKETS) - 1),
+            output_field=IntegerField()
+        )
+        groups = queryset.order_by().annotate(price_bucket=price_bucket).values(
+            'category_id', 'category__name', 'condition', 'is_free',
+            'pickup_available', 'delivery_available', 'price_bucket'
+        ).annotate(count=Count('id'))
+        
+        total = 0
+        categories = {}
+        conditions = {value: 0 for value, _ in WasteProduct.CONDITION_CHOICES}
+        is_free = {'true': 0, 'false': 0}
+        pickup = {'true': 0, 'false': 0}
+        delivery = {'true': 0, 'false': 0}
+        prices = [0] * len(PRICE_BUCKETS)
+        
+        for group in groups:
+            count = group['count']
+            total += count
+            category = categories.setdefault(
+                group['category_id'],
+                {'id': group['category_id'], 'name': group['category__name'], 'count': 0}
+            )
+            category['count'] += count
+            conditions[group['condition']] = conditions.get(group['condition'], 0) + count
+            is_free['true' if group['is_free'] else 'false'] += count
+            pickup['true' if group['pickup_available'] else 'false'] += count
+            delivery['true' if group['delivery_available'] else 'false'] += count
+            prices[group['price_bucket']] += count
+        
+        return {
+            'total': total,
+            'category': sorted(categories.values(), key=lambda c: (-c['count'], c['name'])),
+            'condition': conditions,
+            'is_free': is_free,
+            'pickup_available': pickup,
+            'delivery_available': delivery,
+            'price': [
+                {'min': lower, 'max': upper, 'count': prices[index]}
+                for index, (lower, upper) in enumerate(PRICE_BUCKETS)
+            ],
+        }
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """Typeahead suggestions from the in-memory prefix index"""
+        query = request.query_params.get('q', '')
+        kinds = request.query_params.getlist('type') or None
+        if kinds and not set(kinds) <= {TITLE, CATEGORY, LOCATION}:
+            return Response(
+                {'error': 'type must be one of title, category, location'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), AUTOCOMPLETE_MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        autocomplete_index.ensure_loaded()
+        return Response({
+            'query': query,
+            'results': autocomplete_index.suggest(query, limit=max(limit, 0), kinds=kinds),
+        })
+    
     @action(detail=False, methods=['get'])
     def my_products(self, request):
         """Get current user's products"""
@@ -381,10 +730,9 @@ class WasteProductViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def nearby(self, request):
-        """Get products near user's location"""
+        """Get products near user's location, closest first"""
         lat = request.query_params.get('latitude')
         lng = request.query_params.get('longitude')
-        radius = float(request.query_params.get('radius', 10))  # Default 10km
         
         if not lat or not lng:
             return Response(
@@ -392,31 +740,71 @@ class WasteProductViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Simple distance filter - for production, use proper geospatial queries
+        try:
+            lat = float(lat)
+            lng = float(lng)
+            radius = float(request.query_params.get('radius', 10))  # Default 10km
+        except ValueError:
+            return Response(
+                {'error': 'Latitude, longitude and radius must be numbers'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        exclude_seller_id = request.user.id if request.user.is_authenticated else None
+        if coordinate_snapshot is not None:
+            coordinate_snapshot.ensure_loaded()
+            ids, distances = coordinate_snapshot.query(lat, lng, radius, exclude_seller_id)
+            ranked = list(zip(ids.tolist(), distances.tolist()))
+        else:
+            ranked = self._rank_nearby_from_index(lat, lng, radius, exclude_seller_id)
+        
+        # The ranking is already in memory, so page over the list itself
+        paginator = RankedListPagination()
+        page = paginator.paginate_queryset(ranked, request, view=self)
+        nearby_products = self._load_ranked_products(page)
+        serializer = NearbyWasteProductSerializer(nearby_products, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    def _rank_nearby_from_index(self, lat, lng, radius, exclude_seller_id):
+        """Rank products by distance using the geohash cell index"""
         products = WasteProduct.objects.filter(
             status='available',
             latitude__isnull=False,
             longitude__isnull=False
-        ).exclude(seller=request.user)
-        
-        # Basic distance calculation (not accurate for large distances)
-        nearby_products = []
-        for product in products:
-            if product.latitude and product.longitude:
-                lat_diff = abs(float(lat) - product.latitude)
-                lng_diff = abs(float(lng) - product.longitude)
-                # Rough approximation: 1 degree ≈ 111km
-                distance = ((lat_diff ** 2 + lng_diff ** 2) ** 0.5) * 111
-                if distance <= radius:
-                    nearby_products.append(product)
-        
-        page = self.paginate_queryset(nearby_products)
-        if page is not None:
-            serializer = WasteProductListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        )
+        if exclude_seller_id is not None:
+            products = products.exclude(seller_id=exclude_seller_id)
         
-        serializer = WasteProductListSerializer(nearby_products, many=True)
-        return Response(serializer.data)
+        # Only read the grid cells that overlap the search circle
+        cells = covering_cells(lat, lng, radius)
+        if cells is not None:
+            cell_filter = Q()
+            for cell in cells:
+                cell_filter |= Q(geohash__gte=cell, geohash__lt=cell + GEOHASH_UPPER_BOUND)
+            products = products.filter(cell_filter)
+        
+        ranked = []
+        for product_id, product_lat, product_lng in products.values_list('id', 'latitude', 'longitude'):
+            distance = haversine_km(lat, lng, product_lat, product_lng)
+            if distance <= radius:
+                ranked.append((product_id, distance))
+        ranked.sort(key=lambda item: item[1])
+        return ranked
+    
+    def _load_ranked_products(self, ranked):
+        """Fetch (id, distance) rows as products, keeping the ranking order"""
+        # The snapshot may lag writes from other processes, e.g. expiry sweeps
+        products = WasteProduct.objects.select_related('category').filter(
+            status='available'
+        ).in_bulk([product_id for product_id, _ in ranked])
+        
+        ordered = []
+        for product_id, distance in ranked:
+            product = products.get(product_id)
+            if product is not None:
+                product.distance_km = distance
+                ordered.append(product)
+        return ordered
 
 
 class InterestViewSet(viewsets.ModelViewSet):
@@ -427,7 +815,7 @@ class InterestViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['status', 'product']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         # Users can see interests they made or received
@@ -501,7 +889,11 @@ class MessageViewSet(viewsets.ModelViewSet):
     """
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
-    ordering = ['created_at']
+    # Cursor pagination only honours ``ordering`` when OrderingFilter is enabled
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['interest']
+    ordering_fields = ['created_at']
+    ordering = ['created_at', 'id']
     
     def get_queryset(self):
         # Users can see messages from interests they're involved in
@@ -512,15 +904,9 @@ class MessageViewSet(viewsets.ModelViewSet):
     
     def create(self, request, *args, **kwargs):
         interest_id = request.data.get('interest')
-        try:
-            interest = Interest.objects.get(
-                id=interest_id,
-                buyer=request.user
-            ) or Interest.objects.get(
-                id=interest_id,
-                product__seller=request.user
-            )
-        except Interest.DoesNotExist:
+        if not Interest.objects.filter(
+            Q(buyer=request.user) | Q(product__seller=request.user), id=interest_id
+        ).exists():
             return Response(
                 {'error': 'Interest not found or access denied'}, 
                 status=status.HTTP_404_NOT_FOUND
@@ -528,6 +914,69 @@ class MessageViewSet(viewsets.ModelViewSet):
         
         return super().create(request, *args, **kwargs)
     
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """
+        Page through one conversation's messages, oldest first within a page.
+        ``?interest=`` is required. Without a cursor the newest ``?limit=``
+        messages are returned. With ``?before=<message id>`` the ones just
+        older than that message are returned, and with ``?after=`` the ones
+        just newer.
+        """
+        try:
+            interest_id = int(request.query_params['interest'])
+            limit = int(request.query_params.get('limit', MESSAGE_HISTORY_PAGE_SIZE))
+            before = request.query_params.get('before')
+            after = request.query_params.get('after')
+            cursor_id = int(before or after) if (before or after) else None
+        except KeyError:
+            return Response({'error': 'interest is required'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response(
+                {'error': 'interest, limit, before and after must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if before and after:
+            return Response({'error': 'Use either before or after, not both'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, MESSAGE_HISTORY_MAX_PAGE_SIZE))
+        if not Interest.objects.filter(
+            Q(buyer=request.user) | Q(product__seller=request.user), id=interest_id
+        ).exists():
+            return Response({'error': 'Interest not found or access denied'}, status=status.HTTP_404_NOT_FOUND)
+        
+        messages = Message.objects.filter(interest_id=interest_id).select_related('sender')
+        if cursor_id is not None:
+            cursor = Message.objects.filter(interest_id=interest_id, id=cursor_id).values_list(
+                'created_at', flat=True
+            ).first()
+            if cursor is None:
+                return Response({'error': 'Cursor message not found'}, status=status.HTTP_400_BAD_REQUEST)
+            if after:
+                messages = messages.filter(
+                    Q(created_at__gt=cursor) | Q(created_at=cursor, id__gt=cursor_id)
+                )
+            else:
+                messages = messages.filter(
+                    Q(created_at__lt=cursor) | Q(created_at=cursor, id__lt=cursor_id)
+                )
+        
+        # One extra row tells whether there is more beyond this page
+        if after:
+            page = list(messages.order_by('created_at', 'id')[:limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit]
+        else:
+            page = list(messages.order_by('-created_at', '-id')[:limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit][::-1]
+        
+        return Response({
+            'results': self.get_serializer(page, many=True).data,
+            'has_more': has_more,
+            'before': page[0].id if page else None,
+            'after': page[-1].id if page else None,
+        })
+    
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Mark message as read"""
@@ -554,7 +1003,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['rating', 'reviewed_user']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         return Review.objects.all().select_related('reviewer', 'reviewed_user', 'product')
@@ -640,7 +1089,7 @@ class FavoriteViewSet(viewsets.ModelViewSet):
     """
     serializer_class = FavoriteSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         return Favorite.objects.filter(user=self.request.user).select_related('product')
@@ -652,7 +1101,7 @@ class ReportViewSet(viewsets.ModelViewSet):
     """
     serializer_class = ReportSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         # Users can only see their own reports
@@ -754,30 +1203,32 @@ def marketplace_summary(request):
 def marketplace_stats(request):
     """Get overall marketplace statistics"""
     
-    # Overall stats
-    total_products = WasteProduct.objects.count()
-    available_products = WasteProduct.objects.filter(status='available').count()
-    total_users = User.objects.count()
-    total_transactions = Interest.objects.filter(status='completed').count()
+    # Overall stats, materialized in MarketplaceCounter
+    totals = read_counters()
     
     # Category stats
-    categories_with_counts = Category.objects.annotate(
-        product_count=Count('products')
-    ).values('id', 'name', 'product_count')
+    categories_with_counts = [
+        {
+            'id': category['id'],
+            'name': category['name'],
+            'product_count': totals.get(category_key(category['id']), 0),
+        }
+        for category in Category.objects.values('id', 'name')
+    ]
     
     # Recent activity
     recent_products = WasteProduct.objects.filter(
         status='available'
-    ).select_related('seller', 'category')[:10]
+    ).select_related('category')[:10]
     
     return Response({
         'totals': {
-            'products': total_products,
-            'available_products': available_products,
-            'users': total_users,
-            'completed_transactions': total_transactions,
+            'products': totals.get(PRODUCTS, 0),
+            'available_products': totals.get(AVAILABLE_PRODUCTS, 0),
+            'users': totals.get(USERS, 0),
+            'completed_transactions': totals.get(COMPLETED_TRANSACTIONS, 0),
         },
-        'categories': list(categories_with_counts),
+        'categories': categories_with_counts,
         'recent_products': WasteProductListSerializer(recent_products, many=True).data,
     })
 
@@ -785,44 +1236,15 @@ def marketplace_stats(request):
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_conversations(request):
-    """Get all conversations for the current user"""
-    user = request.user
-    
-    # Get all interests where user is buyer or seller
-    interests = Interest.objects.filter(
-        Q(buyer=user) | Q(product__seller=user)
-    ).select_related('product', 'buyer').prefetch_related('messages')
-    
-    conversations = []
-    for interest in interests:
-        # Get latest message
-        latest_message = interest.messages.first()
-        unread_count = interest.messages.filter(
-            is_read=False
-        ).exclude(sender=user).count()
-        
-        # Determine other participant
-        other_user = interest.buyer if interest.product.seller == user else interest.product.seller
-        
-        conversations.append({
-            'interest_id': interest.id,
-            'product_title': interest.product.title,
-            'product_id': interest.product.id,
-            'other_user': {
-                'id': other_user.id,
-                'name': other_user.full_name,
-            },
-            'status': interest.status,
-            'latest_message': {
-                'content': latest_message.content if latest_message else None,
-                'created_at': latest_message.created_at if latest_message else None,
-                'sender_name': latest_message.sender.full_name if latest_message else None,
-            } if latest_message else None,
-            'unread_count': unread_count,
-            'created_at': interest.created_at,
-        })
-    
-    # Sort by latest activity
-    conversations.sort(key=lambda x: x['latest_message']['created_at'] if x['latest_message'] else x['created_at'], reverse=True)
-    
-    return Response(conversations)
\ No newline at end of file
+    """
+    Get the current user's conversations, most recently active first, read
+    from their conversation summaries and paged with a cursor.
+    """
+    summaries = ConversationSummary.objects.filter(user=request.user).select_related(
+        'interest__product', 'other_user', 'last_message_sender'
+    )
+    paginator = StableCursorPagination()
+    paginator.ordering = ('-last_activity_at', '-id')
+    page = paginator.paginate_queryset(summaries, request)
+    serializer = ConversationSummarySerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
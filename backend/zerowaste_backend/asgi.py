@@ -9,15 +9,24 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'zerowaste_backend.settings')
+
+# Set up Django before importing anything that loads models
+django_asgi_app = get_asgi_application()
+
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
+from api.message_buffer import install_shutdown_handler, lifespan
+from api.middleware import JWTAuthMiddlewareStack
 import api.routing
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'zerowaste_backend.settings')
+# Write queued chat messages before the worker goes away
+install_shutdown_handler()
 
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
-    "websocket": AuthMiddlewareStack(
+    "http": django_asgi_app,
+    "lifespan": lifespan,
+    "websocket": JWTAuthMiddlewareStack(
         URLRouter(
             api.routing.websocket_urlpatterns
         )
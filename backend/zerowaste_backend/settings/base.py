@@ -43,11 +43,50 @@ ROOT_URLCONF = 'zerowaste_backend.urls'
 # Channels (WebSocket) configuration
 ASGI_APPLICATION = 'zerowaste_backend.asgi.application'
 
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'
+# Cache and channel layer - shared Redis when REDIS_URL is set, otherwise
+# per-process memory. Management commands that push notifications (e.g.
+# send_expiry_notifications) only reach websocket clients through Redis.
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
     }
-}
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer'
+        }
+    }
+
+# Marketplace listing cache lifetime in seconds
+MARKETPLACE_LISTING_CACHE_TIMEOUT = 300
+
+# Per-user dashboard snapshot lifetime in seconds; bounds how stale 'overdue' can get
+DASHBOARD_CACHE_TIMEOUT = 60
+
+# Chat write-behind buffer (api.message_buffer): pending messages are inserted
+# once this many are queued or this many seconds after the first one
+CHAT_BUFFER_MAX_SIZE = 100
+CHAT_BUFFER_FLUSH_INTERVAL = 0.5
+# Queue length at which new chat messages are refused, and write attempts
+# per message before a failing one is dropped
+CHAT_BUFFER_MAX_PENDING = 10000
+CHAT_BUFFER_MAX_ATTEMPTS = 5
 
 TEMPLATES = [
     {
@@ -111,7 +150,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.StableCursorPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
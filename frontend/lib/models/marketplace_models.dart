@@ -290,6 +290,9 @@ class Message {
   final String content;
   final bool isRead;
   final DateTime createdAt;
+  // Live chat messages are broadcast before they are stored; until then
+  // they have no server id and are keyed on the broadcast uuid instead.
+  final bool isPending;
 
   Message({
     required this.id,
@@ -299,17 +302,42 @@ class Message {
     required this.content,
     required this.isRead,
     required this.createdAt,
+    this.isPending = false,
   });
 
   factory Message.fromJson(Map<String, dynamic> json) {
+    final isPending = json['id'] == null;
     return Message(
-      id: json['id'].toString(),
+      id: isPending ? (json['uuid']?.toString() ?? '') : json['id'].toString(),
       interestId: json['interest'].toString(),
       senderId: json['sender'].toString(),
       senderName: json['sender_name'],
       content: json['content'],
       isRead: json['is_read'],
       createdAt: DateTime.parse(json['created_at']),
+      isPending: isPending,
+    );
+  }
+
+  Message copyWith({
+    String? id,
+    String? interestId,
+    String? senderId,
+    String? senderName,
+    String? content,
+    bool? isRead,
+    DateTime? createdAt,
+    bool? isPending,
+  }) {
+    return Message(
+      id: id ?? this.id,
+      interestId: interestId ?? this.interestId,
+      senderId: senderId ?? this.senderId,
+      senderName: senderName ?? this.senderName,
+      content: content ?? this.content,
+      isRead: isRead ?? this.isRead,
+      createdAt: createdAt ?? this.createdAt,
+      isPending: isPending ?? this.isPending,
     );
   }
 
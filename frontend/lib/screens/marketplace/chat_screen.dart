@@ -1,3 +1,4 @@
+import 'dart:async';
 import 'package:flutter/material.dart';
 import 'package:provider/provider.dart';
 import 'package:intl/intl.dart';
@@ -23,19 +24,17 @@ class ChatScreen extends StatefulWidget {
 class _ChatScreenState extends State<ChatScreen> {
   final _messageController = TextEditingController();
   final _scrollController = ScrollController();
-  late final ChatWebSocketService _webSocketService;
+  final StreamWebSocketService _webSocketService = StreamWebSocketService.instance;
+  StreamSubscription<Map<String, dynamic>>? _chatSubscription;
   
   Interest? _interest;
   WasteProduct? _product;
   bool _isLoading = true;
   bool _isSending = false;
-  List<Message> _messages = [];
 
   @override
   void initState() {
     super.initState();
-    _webSocketService = ChatWebSocketService();
-    _initializeWebSocket();
     _loadData();
   }
 
@@ -43,31 +42,33 @@ class _ChatScreenState extends State<ChatScreen> {
   void dispose() {
     _messageController.dispose();
     _scrollController.dispose();
-    _webSocketService.disconnect();
+    // The connection is shared; only stop following this conversation
+    _chatSubscription?.cancel();
+    if (_interest != null) {
+      _webSocketService.unsubscribeChat(_interest!.id);
+    }
     super.dispose();
   }
   
-  Future<void> _initializeWebSocket() async {
+  Future<void> _initializeWebSocket(String interestId) async {
     try {
-      await _webSocketService.connectToProductChat(widget.productId);
+      await _webSocketService.subscribeChat(interestId);
       
       // Listen for incoming messages
-      _webSocketService.messageStream.listen((data) {
-        if (data['type'] == 'chat_message' && mounted) {
-          final messageData = data['message'];
-          final message = Message(
-            id: messageData['id'],
-            interestId: widget.interestId ?? '',
-            senderId: messageData['sender_id'],
-            senderName: messageData['sender_name'],
-            content: messageData['content'],
-            isRead: false,
-            createdAt: DateTime.parse(messageData['timestamp']),
+      _chatSubscription = _webSocketService.chatEvents(interestId).listen((data) {
+        if (!mounted) return;
+        final marketplaceService = context.read<MarketplaceService>();
+        if (data['type'] == 'chat_stored') {
+          marketplaceService.markMessagesStored(data['messages'] as List<dynamic>);
+        } else if (data['type'] == 'error') {
+          ScaffoldMessenger.of(context).showSnackBar(
+            SnackBar(
+              content: Text(data['error'].toString()),
+              backgroundColor: Colors.red,
+            ),
           );
-          
-          setState(() {
-            _messages.add(message);
-          });
+        } else if (data['type'] == 'chat_message') {
+          marketplaceService.addLiveMessage(Message.fromJson(data['message']));
           
           // Scroll to bottom
           WidgetsBinding.instance.addPostFrameCallback((_) {
@@ -107,9 +108,10 @@ class _ChatScreenState extends State<ChatScreen> {
             .firstOrNull;
       }
 
-      // Load messages if interest exists
+      // Load messages and join the live chat if interest exists
       if (_interest != null) {
         await marketplaceService.loadMessages(_interest!.id);
+        _initializeWebSocket(_interest!.id);
       }
 
       setState(() {
@@ -714,7 +716,14 @@ class _ChatScreenState extends State<ChatScreen> {
 
     try {
       final marketplaceService = context.read<MarketplaceService>();
-      final success = await marketplaceService.sendMessage(_interest!.id, message);
+      bool success = true;
+      if (_webSocketService.isConnected) {
+        // Broadcast to both participants; our copy comes back as a chat_message
+        _webSocketService.sendChatMessage(_interest!.id, message);
+      } else {
+        // REST stores the message but the other participant only sees it on reload
+        success = await marketplaceService.sendMessage(_interest!.id, message);
+      }
 
       if (success) {
         _messageController.clear();
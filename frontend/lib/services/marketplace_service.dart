@@ -252,7 +252,7 @@ class MarketplaceService extends ChangeNotifier {
     if (!_authService.isAuthenticated) return;
     
     try {
-      final response = await _dio.get('/marketplace/messages/?interest=$interestId');
+      final response = await _dio.get('/marketplace/messages/history/?interest=$interestId');
       _messages = (response.data['results'] as List)
           .map((json) => mp.Message.fromJson(json))
           .toList();
@@ -262,6 +262,30 @@ class MarketplaceService extends ChangeNotifier {
     }
   }
 
+  // Messages broadcast over the chat socket; pending ones are keyed on
+  // their uuid until a chat_stored event gives them their stored id
+  void addLiveMessage(mp.Message message) {
+    if (_messages.any((m) => m.id == message.id)) return;
+    _messages.add(message);
+    notifyListeners();
+  }
+
+  void markMessagesStored(List<dynamic> stored) {
+    final ids = {
+      for (final entry in stored) entry['uuid'].toString(): entry['id'].toString()
+    };
+    final storedIds = _messages.where((m) => !m.isPending).map((m) => m.id).toSet();
+    // A history reload may already hold the stored copy; drop the pending one
+    _messages = [
+      for (final m in _messages)
+        if (!m.isPending || !ids.containsKey(m.id))
+          m
+        else if (!storedIds.contains(ids[m.id]))
+          m.copyWith(id: ids[m.id], isPending: false)
+    ];
+    notifyListeners();
+  }
+
   Future<bool> sendMessage(String interestId, String content) async {
     if (!_authService.isAuthenticated) return false;
     
@@ -2,6 +2,7 @@ import 'dart:convert';
 import 'dart:async';
 import 'package:web_socket_channel/web_socket_channel.dart';
 import 'package:flutter/foundation.dart';
+import 'package:flutter_secure_storage/flutter_secure_storage.dart';
 
 class WebSocketService {
   WebSocketChannel? _channel;
@@ -96,24 +97,22 @@ class WebSocketService {
 }
 
 class ChatWebSocketService extends WebSocketService {
-  String? _productId;
+  static const _storage = FlutterSecureStorage();
+  String? _interestId;
   
-  Future<void> connectToProductChat(String productId) async {
-    _productId = productId;
+  // The server authenticates the connection from the JWT access token and
+  // takes the sender from it, so messages carry only their content.
+  Future<void> connectToInterestChat(String interestId) async {
+    _interestId = interestId;
+    final token = await _storage.read(key: 'auth_token');
     const baseUrl = kIsWeb ? 'ws://127.0.0.1:8000' : 'ws://10.0.2.2:8000';
-    final url = '$baseUrl/ws/chat/$productId/';
+    final url = '$baseUrl/ws/chat/$interestId/?token=${Uri.encodeQueryComponent(token ?? '')}';
     await connect(url);
   }
   
-  void sendChatMessage({
-    required String message,
-    required String senderId,
-    required String receiverId,
-  }) {
+  void sendChatMessage({required String message}) {
     sendMessage({
       'message': message,
-      'sender_id': senderId,
-      'receiver_id': receiverId,
     });
   }
 }
@@ -132,3 +131,89 @@ class NotificationWebSocketService extends WebSocketService {
     });
   }
 }
+
+/// One authenticated connection to `ws/stream/` shared by the whole app.
+/// Conversations and notifications are subscribed to over it instead of
+/// opening a socket per chat screen.
+class StreamWebSocketService extends WebSocketService {
+  StreamWebSocketService._();
+  static final StreamWebSocketService instance = StreamWebSocketService._();
+  static const _storage = FlutterSecureStorage();
+  
+  final StreamController<Map<String, dynamic>> _events =
+      StreamController<Map<String, dynamic>>.broadcast();
+  StreamSubscription<Map<String, dynamic>>? _forwarding;
+  final Set<String> _chatSubscriptions = {};
+  bool _notifications = false;
+  
+  // Survives reconnects, unlike messageStream
+  Stream<Map<String, dynamic>> get events => _events.stream;
+  
+  Stream<Map<String, dynamic>> chatEvents(String interestId) => events.where(
+      (event) => event['stream'] == 'chat' && event['interest'].toString() == interestId);
+  
+  Stream<Map<String, dynamic>> get notificationEvents =>
+      events.where((event) => event['stream'] == 'notifications');
+  
+  @override
+  Future<void> connect(String url) async {
+    await super.connect(url);
+    await _forwarding?.cancel();
+    _forwarding = messageStream.listen(_events.add);
+    
+    // Subscriptions belong to the connection, so renew them after a reconnect
+    for (final interestId in _chatSubscriptions) {
+      _sendFrame('subscribe', 'chat', interestId);
+    }
+    if (_notifications) {
+      _sendFrame('subscribe', 'notifications');
+    }
+  }
+  
+  Future<void> ensureConnected() async {
+    if (isConnected) return;
+    final token = await _storage.read(key: 'auth_token');
+    const baseUrl = kIsWeb ? 'ws://127.0.0.1:8000' : 'ws://10.0.2.2:8000';
+    await connect('$baseUrl/ws/stream/?token=${Uri.encodeQueryComponent(token ?? '')}');
+  }
+  
+  Future<void> subscribeChat(String interestId) async {
+    final isNew = _chatSubscriptions.add(interestId);
+    await ensureConnected();
+    if (isNew) _sendFrame('subscribe', 'chat', interestId);
+  }
+  
+  void unsubscribeChat(String interestId) {
+    if (_chatSubscriptions.remove(interestId) && isConnected) {
+      _sendFrame('unsubscribe', 'chat', interestId);
+    }
+  }
+  
+  Future<void> subscribeNotifications() async {
+    final isNew = !_notifications;
+    _notifications = true;
+    await ensureConnected();
+    if (isNew) _sendFrame('subscribe', 'notifications');
+  }
+  
+  void unsubscribeNotifications() {
+    if (_notifications && isConnected) {
+      _sendFrame('unsubscribe', 'notifications');
+    }
+    _notifications = false;
+  }
+  
+  void sendChatMessage(String interestId, String message) {
+    _sendFrame('send', 'chat', interestId, {'message': message});
+  }
+  
+  void _sendFrame(String action, String stream,
+      [String? interestId, Map<String, dynamic> extra = const {}]) {
+    sendMessage({
+      'action': action,
+      'stream': stream,
+      if (interestId != null) 'interest': int.tryParse(interestId) ?? interestId,
+      ...extra,
+    });
+  }
+}